@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import time
+
 import click
 
 from ckanext.showcase import utils
@@ -15,11 +17,86 @@ def showcase():
 
 
 @showcase.command()
-def markdown_to_html():
+@click.option('--batch-size', default=100, show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of showcases migrated at a time.')
+@click.option('--workers', default=1, show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of processes migrating the showcases.')
+@click.option('--dry-run', is_flag=True,
+              help='Render the notes without saving them.')
+@click.option('--resume-from', metavar='ID',
+              help='Only migrate the showcases with a greater id, eg the '
+                   'last id printed by an interrupted run.')
+def markdown_to_html(batch_size, workers, dry_run, resume_from):
     '''
         showcase markdown-to-html
     '''
-    utils.markdown_to_html()
+    utils.markdown_to_html(batch_size=batch_size, workers=workers,
+                           dry_run=dry_run, resume_from=resume_from,
+                           echo=click.echo)
+
+
+@showcase.command()
+@click.argument('output_file', type=click.File('w'), default='-')
+def export(output_file):
+    '''
+        showcase export [OUTPUT_FILE]
+
+    Write the showcases, their datasets and the showcase admins as JSON Lines
+    to OUTPUT_FILE, or to stdout.
+    '''
+    counts = utils.export_showcases(output_file)
+    click.echo('Exported {showcase} showcases, {association} associations and '
+               '{admin} admins'.format(**counts), err=True)
+
+
+@showcase.command('import')
+@click.argument('input_file', type=click.File('r'), default='-')
+@click.option('--batch-size', default=1000, show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of associations inserted at a time.')
+def import_(input_file, batch_size):
+    '''
+        showcase import [INPUT_FILE]
+
+    Create the showcases, dataset associations and showcase admins read as
+    JSON Lines from INPUT_FILE, or from stdin, as written by `showcase
+    export`. Existing ones are skipped.
+    '''
+    start = time.monotonic()
+    result = utils.import_showcases(input_file, batch_size=batch_size,
+                                    echo=click.echo)
+    for record_type in ('showcase', 'association', 'admin'):
+        click.echo('{0}: {1} created, {2} skipped'.format(
+            record_type, result['created'][record_type],
+            result['skipped'][record_type]))
+    click.echo('Finished in {0:.1f}s'.format(time.monotonic() - start))
+
+
+@showcase.command()
+@click.option('--only', type=click.Choice(utils.REINDEX_CHOICES),
+              default='all', show_default=True,
+              help='Reindex the showcases, the datasets in a showcase, or '
+                   'both.')
+@click.option('--workers', default=1, show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of indexing processes.')
+@click.option('--batch-size', default=100, show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of documents indexed between Solr commits.')
+def reindex(only, workers, batch_size):
+    '''
+        showcase reindex
+
+    Rebuild the search index documents of the showcases and of the datasets
+    in a showcase only.
+    '''
+    try:
+        utils.reindex(only=only, workers=workers, batch_size=batch_size,
+                      echo=click.echo)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
 
 
 def get_commands():
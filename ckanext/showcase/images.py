@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+'''
+Smaller variants of the showcase images, so listing pages don't download
+every full size upload.
+
+The variants are created by a background job after the original image is
+stored, using Pillow if it is installed. They are only created for images
+stored by CKAN's local uploader.
+'''
+import logging
+import os
+
+import ckan.lib.uploader as uploader
+import ckan.lib.helpers as h
+import ckan.plugins.toolkit as tk
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+log = logging.getLogger(__name__)
+
+# name -> (max width, max height)
+IMAGE_VARIANTS = {
+    'thumbnail': (320, 180),
+    'card': (640, 360),
+}
+VARIANTS_DIR = 'variants'
+
+
+def image_variants_enabled():
+    return Image is not None and tk.asbool(
+        tk.config.get('ckanext.showcase.image_variants', True))
+
+
+def _variants_path():
+    storage_path = uploader.get_storage_path()
+    if not storage_path:
+        return None
+    return os.path.join(storage_path, 'storage', 'uploads', 'showcase',
+                        VARIANTS_DIR)
+
+
+def _variant_filename(filename, variant):
+    return '{0}.{1}.webp'.format(os.path.basename(filename), variant)
+
+
+def image_variant_url(filename, variant):
+    '''
+    Return the url of the given variant of the uploaded showcase image
+    `filename`, or None if it hasn't been created (yet).
+    '''
+    path = _variants_path()
+    variant_filename = _variant_filename(filename, variant)
+    if not path or not os.path.exists(os.path.join(path, variant_filename)):
+        return None
+    return h.url_for_static(
+        'uploads/showcase/{0}/{1}'.format(VARIANTS_DIR, variant_filename),
+        qualified=True)
+
+
+def enqueue_image_variants(upload):
+    '''
+    Queue a job creating the variants of the image just stored by `upload`,
+    and remove the variants of the image it replaced, if any.
+    '''
+    if not isinstance(upload, uploader.Upload) \
+            or not getattr(upload, 'storage_path', None):
+        return
+
+    # content-addressed files, and so their variants, may be shared by
+    # several showcases
+    if upload.old_filename and (upload.filename or upload.clear) \
+            and not getattr(upload, 'content_addressed', False):
+        remove_image_variants(upload.old_filename)
+
+    if upload.filename and image_variants_enabled():
+        tk.enqueue_job(create_image_variants, [upload.filename],
+                       title='showcase image variants {0}'.format(
+                           upload.filename))
+
+
+def create_image_variants(filename):
+    '''
+    Background job creating the WebP variants of the uploaded showcase image
+    `filename`.
+    '''
+    if Image is None:
+        log.warning('Pillow is not installed, not creating image variants')
+        return
+    path = _variants_path()
+    if not path:
+        return
+
+    original = os.path.join(os.path.dirname(path),
+                            os.path.basename(filename))
+    if not os.path.isfile(original):
+        log.warning('Showcase image %s not found', original)
+        return
+
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+
+    try:
+        with Image.open(original) as image:
+            image.load()
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            for variant, size in IMAGE_VARIANTS.items():
+                resized = image.copy()
+                resized.thumbnail(size)
+                target = os.path.join(path,
+                                      _variant_filename(filename, variant))
+                # write to a temporary file first, so the variant is never
+                # served half written
+                tmp_target = target + '.tmp'
+                resized.save(tmp_target, 'WEBP')
+                os.replace(tmp_target, target)
+    except (IOError, OSError, ValueError) as e:
+        log.warning('Could not create variants of showcase image %s: %s',
+                    original, e)
+
+
+def remove_image_variants(filename):
+    path = _variants_path()
+    if not path:
+        return
+    for variant in IMAGE_VARIANTS:
+        try:
+            os.remove(os.path.join(path,
+                                   _variant_filename(filename, variant)))
+        except OSError:
+            pass
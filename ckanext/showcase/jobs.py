@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+'''
+Background reindexing of the showcases whose datasets changed, so the fields
+describing their datasets in the search index (see
+`ShowcasePlugin.before_dataset_index`) stay up to date.
+
+The showcases of a changed dataset are collected on the database session and
+only queued once it is committed, so the jobs always read the change.
+
+Bursts of changes are coalesced: while a job is queued or running for a
+showcase, a Redis key marks it as queued and no other job is queued for it.
+Each change also sets a "changed" key, which the job clears when it starts.
+If it is set again when the job ends, the changes made while it ran are not
+in the showcase's document, and the job queues another one.
+'''
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import event
+
+import ckan.model as model
+from ckan.lib.redis import connect_to_redis
+import ckan.plugins.toolkit as tk
+
+from ckanext.showcase import utils
+from ckanext.showcase.model import ShowcasePackageAssociation
+
+log = logging.getLogger(__name__)
+
+# Safety net, in case a queued job is lost before removing its key
+PENDING_KEY_TTL = 60 * 60
+
+# key of the database session info holding the ids of the showcases to
+# reindex once the session is committed
+SESSION_INFO_KEY = 'ckanext_showcase_reindex'
+
+
+def reindex_on_dataset_change_enabled():
+    return tk.asbool(
+        tk.config.get('ckanext.showcase.reindex_on_dataset_change', True))
+
+
+def _queued_key(showcase_id):
+    return '{0}:ckanext-showcase:reindex-queued:{1}'.format(
+        tk.config.get('ckan.site_id'), showcase_id)
+
+
+def _changed_key(showcase_id):
+    return '{0}:ckanext-showcase:reindex-changed:{1}'.format(
+        tk.config.get('ckan.site_id'), showcase_id)
+
+
+def reindex_showcases_after_commit(package_id):
+    '''
+    Reindex each of the showcases of the given dataset in the background,
+    once the current database session is committed.
+    '''
+    showcase_ids = [
+        showcase_id for (showcase_id,) in
+        ShowcasePackageAssociation.get_showcase_ids_for_package(package_id)]
+    if showcase_ids:
+        model.Session.info.setdefault(SESSION_INFO_KEY, set()).update(
+            showcase_ids)
+
+
+@event.listens_for(model.Session, 'after_commit')
+def _enqueue_after_commit(session):
+    for showcase_id in sorted(session.info.pop(SESSION_INFO_KEY, ())):
+        enqueue_showcase_reindex(showcase_id)
+
+
+def enqueue_showcase_reindex(showcase_id):
+    '''
+    Queue a job reindexing the given showcase, unless one is already queued
+    or running for it.
+    '''
+    try:
+        redis_conn = connect_to_redis()
+        redis_conn.set(_changed_key(showcase_id), '1', ex=PENDING_KEY_TTL)
+        if not redis_conn.set(_queued_key(showcase_id), '1', nx=True,
+                              ex=PENDING_KEY_TTL):
+            return
+    except RedisError as e:
+        # the showcase is refreshed on its next reindex anyway, this must not
+        # break updating the dataset
+        log.warning('Could not queue the reindex of showcase %s: %s',
+                    showcase_id, e)
+        return
+
+    try:
+        tk.enqueue_job(reindex_showcase, [showcase_id],
+                       title='showcase reindex {0}'.format(showcase_id))
+    except Exception as e:
+        # the change is committed already, only log the failure, and don't
+        # block the next reindexes of the showcase until the key expires
+        log.warning('Could not queue the reindex of showcase %s: %s',
+                    showcase_id, e)
+        try:
+            redis_conn.delete(_queued_key(showcase_id))
+        except RedisError:
+            pass
+
+
+def reindex_showcase(showcase_id):
+    '''
+    Background job reindexing the given showcase.
+    '''
+    try:
+        connect_to_redis().delete(_changed_key(showcase_id))
+    except RedisError as e:
+        log.warning('Could not clear the changes of showcase %s: %s',
+                    showcase_id, e)
+
+    showcase = model.Package.get(showcase_id)
+    if showcase and showcase.type == utils.DATASET_TYPE_NAME:
+        utils.reindex_packages([showcase.id])
+
+    try:
+        redis_conn = connect_to_redis()
+        redis_conn.delete(_queued_key(showcase_id))
+        changed = redis_conn.exists(_changed_key(showcase_id))
+    except RedisError as e:
+        log.warning('Could not clear the queued reindex of showcase %s: %s',
+                    showcase_id, e)
+        return
+    if changed:
+        enqueue_showcase_reindex(showcase_id)
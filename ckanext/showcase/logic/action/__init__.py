@@ -20,6 +20,10 @@ def get_actions():
             ckanext.showcase.logic.action.create.showcase_package_association_create,
         'ckanext_showcase_package_association_delete':
             ckanext.showcase.logic.action.delete.showcase_package_association_delete,
+        'ckanext_showcase_package_association_bulk_create':
+            ckanext.showcase.logic.action.create.showcase_package_association_bulk_create,
+        'ckanext_showcase_package_association_bulk_delete':
+            ckanext.showcase.logic.action.delete.showcase_package_association_bulk_delete,
         'ckanext_showcase_package_list':
             ckanext.showcase.logic.action.get.showcase_package_list,
         'ckanext_package_showcase_list':
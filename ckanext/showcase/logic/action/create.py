@@ -8,12 +8,19 @@ from ckan.lib.navl.dictization_functions import validate
 
 import ckanext.showcase.logic.converters as showcase_converters
 import ckanext.showcase.logic.schema as showcase_schema
+from ckanext.showcase.logic.validators import resolve_package_names_or_ids
 from ckanext.showcase.model import ShowcasePackageAssociation, ShowcaseAdmin
+from ckanext.showcase import utils
+from ckanext.showcase import images
+from ckanext.showcase.logic.auth import invalidate_showcase_admin_cache
+from ckanext.showcase.logic.cache import clear_request_cache
 
 convert_package_name_or_id_to_title_or_name = \
     showcase_converters.convert_package_name_or_id_to_title_or_name
 showcase_package_association_create_schema = \
     showcase_schema.showcase_package_association_create_schema
+showcase_package_association_bulk_create_schema = \
+    showcase_schema.showcase_package_association_bulk_create_schema
 showcase_admin_add_schema = showcase_schema.showcase_admin_add_schema
 
 log = logging.getLogger(__name__)
@@ -30,6 +37,8 @@ def showcase_create(context, data_dict):
                             'image_upload', 'clear_upload')
 
     upload.upload(uploader.get_max_image_size())
+    # the smaller variants of the image are made in the background
+    images.enqueue_image_variants(upload)
 
     pkg = toolkit.get_action('package_create')(context, data_dict)
 
@@ -66,8 +75,88 @@ def showcase_package_association_create(context, data_dict):
                                       error_summary=u"The dataset, {0}, is already in the showcase".format(convert_package_name_or_id_to_title_or_name(package_id, context)))
 
     # create the association
-    return ShowcasePackageAssociation.create(package_id=package_id,
-                                             showcase_id=showcase_id)
+    association = ShowcasePackageAssociation.create(package_id=package_id,
+                                                    showcase_id=showcase_id)
+
+    # the dataset's search index document lists the showcases it belongs to,
+    # the showcase's describes its datasets
+    clear_request_cache('showcase_package_list')
+    utils.reindex_packages([package_id, showcase_id])
+
+    return association
+
+
+def showcase_package_association_bulk_create(context, data_dict):
+    '''Create associations between a showcase and many packages at once.
+
+    The packages are looked up with a single query and associated in a single
+    transaction. Packages that don't exist or are already in the showcase are
+    skipped and reported in the returned errors.
+
+    :param showcase_id: id or name of the showcase to associate
+    :type showcase_id: string
+
+    :param package_ids: ids or names of the packages to associate
+    :type package_ids: list of strings
+
+    :returns: the ids of the packages added to the showcase (``created``) and
+        an error message for each package id or name that couldn't be added
+        (``errors``)
+    :rtype: dictionary
+    '''
+
+    toolkit.check_access('ckanext_showcase_package_association_bulk_create',
+                         context, data_dict)
+
+    # validate the incoming data_dict
+    validated_data_dict, errors = validate(
+        data_dict, showcase_package_association_bulk_create_schema(), context)
+
+    if errors:
+        raise toolkit.ValidationError(errors)
+
+    showcase_id = validated_data_dict['showcase_id']
+    package_names_or_ids = list(dict.fromkeys(
+        validated_data_dict['package_ids']))
+
+    resolved = resolve_package_names_or_ids(package_names_or_ids, context)
+    associated_ids = ShowcasePackageAssociation.get_associated_package_ids(
+        showcase_id, [package_id for (package_id, title) in resolved.values()])
+
+    already_in_showcase = u"The dataset, {0}, is already in the showcase"
+    created = []
+    requested = {}
+    errors = {}
+    for name_or_id in package_names_or_ids:
+        if name_or_id not in resolved:
+            errors[name_or_id] = u'{0}: {1}'.format(toolkit._('Not found'),
+                                                    toolkit._('Dataset'))
+            continue
+        package_id, title = resolved[name_or_id]
+        if package_id in associated_ids:
+            errors[name_or_id] = already_in_showcase.format(title)
+            continue
+        # the same package may have been passed by both name and id
+        associated_ids.add(package_id)
+        created.append(package_id)
+        requested[package_id] = (name_or_id, title)
+
+    # create the associations, those created by another request in the
+    # meantime are reported like the ones found above
+    inserted = set(
+        ShowcasePackageAssociation.create_many(showcase_id, created))
+    for package_id in created:
+        if package_id not in inserted:
+            name_or_id, title = requested[package_id]
+            errors[name_or_id] = already_in_showcase.format(title)
+    created = [package_id for package_id in created
+               if package_id in inserted]
+
+    clear_request_cache('showcase_package_list')
+    if created:
+        utils.reindex_packages(created + [showcase_id])
+
+    return {'created': created, 'errors': errors}
 
 
 def showcase_admin_add(context, data_dict):
@@ -97,7 +186,9 @@ def showcase_admin_add(context, data_dict):
                                       error_summary=u"User '{0}' is already a Showcase Admin.".format(username))
 
     # create showcase admin entry
-    return ShowcaseAdmin.create(user_id=user_id)
+    showcase_admin = ShowcaseAdmin.create(user_id=user_id)
+    invalidate_showcase_admin_cache()
+    return showcase_admin
 
 
 def showcase_upload(context, data_dict):
@@ -6,9 +6,14 @@ import ckan.lib.navl.dictization_functions
 
 from ckanext.showcase.logic.schema import (
     showcase_package_association_delete_schema,
+    showcase_package_association_bulk_delete_schema,
     showcase_admin_remove_schema)
+from ckanext.showcase.logic.validators import resolve_package_names_or_ids
 
 from ckanext.showcase.model import ShowcasePackageAssociation, ShowcaseAdmin
+from ckanext.showcase import utils
+from ckanext.showcase.logic.auth import invalidate_showcase_admin_cache
+from ckanext.showcase.logic.cache import clear_request_cache
 
 validate = ckan.lib.navl.dictization_functions.validate
 
@@ -33,9 +38,18 @@ def showcase_delete(context, data_dict):
 
     toolkit.check_access('ckanext_showcase_delete', context, data_dict)
 
+    package_ids = [package_id for (package_id,) in
+                   ShowcasePackageAssociation.get_package_ids_for_showcase(
+                       entity.id)]
+
     entity.purge()
     model.repo.commit()
 
+    # the associations are gone, so is the showcase from the search index
+    # documents of its datasets
+    clear_request_cache('showcase_package_list')
+    utils.reindex_packages(package_ids)
+
 
 def showcase_package_association_delete(context, data_dict):
     '''Delete an association between a showcase and a package.
@@ -73,6 +87,72 @@ def showcase_package_association_delete(context, data_dict):
     showcase_package_association.delete()
     model.repo.commit()
 
+    clear_request_cache('showcase_package_list')
+    utils.reindex_packages([package_id, showcase_id])
+
+
+def showcase_package_association_bulk_delete(context, data_dict):
+    '''Delete associations between a showcase and many packages at once.
+
+    The packages are looked up with a single query and their associations
+    deleted in a single transaction. Packages that don't exist or aren't in
+    the showcase are skipped and reported in the returned errors.
+
+    :param showcase_id: id or name of the showcase in the associations
+    :type showcase_id: string
+
+    :param package_ids: ids or names of the packages in the associations
+    :type package_ids: list of strings
+
+    :returns: the ids of the packages removed from the showcase
+        (``deleted``) and an error message for each package id or name that
+        couldn't be removed (``errors``)
+    :rtype: dictionary
+    '''
+
+    toolkit.check_access('ckanext_showcase_package_association_bulk_delete',
+                         context, data_dict)
+
+    # validate the incoming data_dict
+    validated_data_dict, errors = validate(
+        data_dict, showcase_package_association_bulk_delete_schema(), context)
+
+    if errors:
+        raise toolkit.ValidationError(errors)
+
+    showcase_id = validated_data_dict['showcase_id']
+    package_names_or_ids = list(dict.fromkeys(
+        validated_data_dict['package_ids']))
+
+    resolved = resolve_package_names_or_ids(package_names_or_ids, context)
+    associated_ids = ShowcasePackageAssociation.get_associated_package_ids(
+        showcase_id, [package_id for (package_id, title) in resolved.values()])
+
+    deleted = []
+    errors = {}
+    for name_or_id in package_names_or_ids:
+        if name_or_id not in resolved:
+            errors[name_or_id] = u'{0}: {1}'.format(toolkit._('Not found'),
+                                                    toolkit._('Dataset'))
+            continue
+        package_id, title = resolved[name_or_id]
+        if package_id not in associated_ids:
+            errors[name_or_id] = \
+                u"The dataset, {0}, is not in the showcase".format(title)
+            continue
+        # the same package may have been passed by both name and id
+        associated_ids.discard(package_id)
+        deleted.append(package_id)
+
+    # delete the associations
+    ShowcasePackageAssociation.delete_many(showcase_id, deleted)
+
+    clear_request_cache('showcase_package_list')
+    if deleted:
+        utils.reindex_packages(deleted + [showcase_id])
+
+    return {'deleted': deleted, 'errors': errors}
+
 
 def showcase_admin_remove(context, data_dict):
     '''Remove a user to the list of showcase admins.
@@ -103,3 +183,4 @@ def showcase_admin_remove(context, data_dict):
 
     showcase_admin_to_remove.delete()
     model.repo.commit()
+    invalidate_showcase_admin_cache()
@@ -1,14 +1,39 @@
+import datetime
+
+from sqlalchemy import func
+
 import ckan.plugins.toolkit as toolkit
 import ckan.lib.dictization.model_dictize as model_dictize
 from ckan.lib.navl.dictization_functions import validate
 
-from ckanext.showcase.logic.schema import (showcase_package_list_schema,
+from ckanext.showcase.logic.schema import (showcase_list_schema,
+                                           showcase_package_list_schema,
                                            package_showcase_list_schema)
 from ckanext.showcase.model import ShowcasePackageAssociation, ShowcaseAdmin
+from ckanext.showcase import utils
+from ckanext.showcase.logic.cache import get_request_cache
 
 import logging
 log = logging.getLogger(__name__)
 
+# Columns that can be requested with the `fields` parameter of
+# ckanext_showcase_list.
+SHOWCASE_LIST_FIELDS = ('id', 'name', 'title', 'notes', 'url', 'author',
+                        'author_email', 'state', 'metadata_created',
+                        'metadata_modified')
+
+# Fields ckanext_showcase_list can sort by.
+SHOWCASE_LIST_SORT_FIELDS = ('title', 'metadata_modified', 'num_datasets')
+
+# Number of datasets requested from Solr at a time when listing the datasets
+# of a showcase.
+PACKAGE_LIST_CHUNK_SIZE = 100
+# Fields of the package search index documents that can be requested from
+# ckanext_showcase_package_list with `fl`
+PACKAGE_LIST_FIELDS = ('id', 'name', 'title', 'notes', 'url', 'author',
+                       'author_email', 'organization', 'license_id',
+                       'metadata_created', 'metadata_modified')
+
 
 @toolkit.side_effect_free
 def showcase_show(context, data_dict):
@@ -16,10 +41,20 @@ def showcase_show(context, data_dict):
 
     :param id: the id or name of the showcase
     :type id: string
+    :param include_showcase_extras: if False, the number of datasets
+        (``num_datasets``) and the rendered notes
+        (``showcase_notes_formatted``) are not computed (optional,
+        default: True)
+    :type include_showcase_extras: bool
     '''
 
     toolkit.check_access('ckanext_showcase_show', context, data_dict)
 
+    if 'include_showcase_extras' in data_dict:
+        data_dict = dict(data_dict)
+        context['showcase_extras'] = toolkit.asbool(
+            data_dict.pop('include_showcase_extras'))
+
     pkg_dict = toolkit.get_action('package_show')(context, data_dict)
 
     return pkg_dict
@@ -27,29 +62,160 @@ def showcase_show(context, data_dict):
 
 @toolkit.side_effect_free
 def showcase_list(context, data_dict):
-    '''Return a list of all showcases in the site.'''
+    '''Return a list of all showcases in the site.
+
+    :param fields: only return these columns of each showcase, read with a
+        single query instead of dictizing every showcase (optional, default:
+        full showcase dicts). Any of: id, name, title, notes, url, author,
+        author_email, state, metadata_created, metadata_modified
+    :type fields: list of strings
+    :param sort: the field to sort the showcases by, optionally followed by
+        ``asc`` or ``desc``. One of title, metadata_modified or num_datasets
+        (optional, default: ``title asc``)
+    :type sort: string
+    :param limit: the maximum number of showcases to return (optional,
+        default: all of them)
+    :type limit: int
+    :param offset: the number of showcases to skip before the first one
+        returned (optional, default: 0)
+    :type offset: int
+    :param include_count: if True, return a dictionary with the total number
+        of showcases (``count``) and the requested showcases (``results``)
+        instead of a list (optional, default: False)
+    :type include_count: bool
+
+    :rtype: list of dictionaries, or a dictionary if include_count is True
+    '''
 
     toolkit.check_access('ckanext_showcase_list', context, data_dict)
 
+    # validate the incoming data_dict
+    validated_data_dict, errors = validate(data_dict, showcase_list_schema(),
+                                           context)
+
+    if errors:
+        raise toolkit.ValidationError(errors)
+
     model = context["model"]
 
-    q = model.Session.query(model.Package) \
+    fields = validated_data_dict.get('fields')
+    if fields:
+        unknown_fields = [f for f in fields if f not in SHOWCASE_LIST_FIELDS]
+        if unknown_fields:
+            raise toolkit.ValidationError(
+                {'fields': ['Unknown fields: {0}'.format(
+                    ', '.join(unknown_fields))]})
+        columns = [getattr(model.Package, f) for f in fields]
+    else:
+        columns = [model.Package]
+
+    sort_field, sort_order = _parse_showcase_list_sort(
+        validated_data_dict.get('sort', 'title asc'))
+
+    q = model.Session.query(*columns) \
         .filter(model.Package.type == 'showcase') \
         .filter(model.Package.state == 'active')
 
-    showcase_list = []
-    for pkg in q.all():
-        showcase_list.append(model_dictize.package_dictize(pkg, context))
-
+    if validated_data_dict.get('include_count'):
+        count = model.Session.query(func.count(model.Package.id)) \
+            .filter(model.Package.type == 'showcase') \
+            .filter(model.Package.state == 'active') \
+            .scalar()
+
+    if sort_field == 'num_datasets':
+        counts = ShowcasePackageAssociation.get_package_counts_subquery()
+        q = q.outerjoin(counts, counts.c.showcase_id == model.Package.id)
+        sort_column = func.coalesce(counts.c.num_datasets, 0)
+    else:
+        sort_column = getattr(model.Package, sort_field)
+    q = q.order_by(getattr(sort_column, sort_order)(), model.Package.id)
+
+    if validated_data_dict.get('offset'):
+        q = q.offset(validated_data_dict['offset'])
+    if validated_data_dict.get('limit') is not None:
+        q = q.limit(validated_data_dict['limit'])
+
+    if fields:
+        showcase_list = [dict(zip(fields, [_isoformat(value) for value in row]))
+                         for row in q]
+    else:
+        showcase_list = []
+        for pkg in q.all():
+            showcase_list.append(model_dictize.package_dictize(pkg, context))
+
+    if validated_data_dict.get('include_count'):
+        return {'count': count, 'results': showcase_list}
     return showcase_list
 
 
+def _parse_showcase_list_sort(sort):
+    '''Return a (field, order) tuple for a showcase list sort string.'''
+    parts = sort.split()
+    if (len(parts) not in (1, 2)
+            or parts[0] not in SHOWCASE_LIST_SORT_FIELDS
+            or (len(parts) == 2 and parts[1].lower() not in ('asc', 'desc'))):
+        raise toolkit.ValidationError(
+            {'sort': ['Invalid sort: {0}'.format(sort)]})
+    return parts[0], parts[1].lower() if len(parts) == 2 else 'asc'
+
+
+def _isoformat(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _iter_showcase_packages(context, showcase_id, offset=0, limit=None,
+                            fl=None):
+    '''Yield the dicts of the active datasets associated with a showcase.
+
+    Datasets are found through the showcase ids indexed on them and fetched
+    from Solr PACKAGE_LIST_CHUNK_SIZE at a time, in the order of their ids,
+    skipping the first `offset` ones and stopping after `limit` of them (if
+    given). If `fl` is given, the dicts only hold those fields, as stored in
+    the search index.
+    '''
+    fq = '+' + utils.showcase_membership_fq(showcase_id)
+    start = offset
+    remaining = limit
+    while remaining is None or remaining > 0:
+        rows = PACKAGE_LIST_CHUNK_SIZE
+        if remaining is not None:
+            rows = min(rows, remaining)
+            remaining -= rows
+        # sort on a field that doesn't change, so datasets updated between
+        # two chunks aren't moved to another one
+        search_dict = {'fq': fq, 'rows': rows, 'start': start,
+                       'sort': 'id asc'}
+        if fl:
+            search_dict['fl'] = fl
+        _pkg_list = toolkit.get_action('package_search')(context,
+                                                         search_dict)
+        results = _pkg_list['results']
+        for pkg_dict in results:
+            yield pkg_dict
+        start += len(results)
+        if len(results) < rows or start >= _pkg_list['count']:
+            return
+
+
 @toolkit.side_effect_free
 def showcase_package_list(context, data_dict):
     '''List packages associated with a showcase.
 
     :param showcase_id: id or name of the showcase
     :type showcase_id: string
+    :param limit: the maximum number of packages to return (optional,
+        default: all of them)
+    :type limit: int
+    :param offset: the number of packages to skip before the first one
+        returned (optional, default: 0)
+    :type offset: int
+    :param fl: only return these fields of the packages, as stored in the
+        search index, instead of the full package dicts (optional). Must be
+        among id, name, title, notes, url, author, author_email,
+        organization, license_id, metadata_created and metadata_modified.
+    :type fl: list of strings
 
     :rtype: list of dictionaries
     '''
@@ -64,23 +230,35 @@ def showcase_package_list(context, data_dict):
     if errors:
         raise toolkit.ValidationError(errors)
 
-    # get a list of package ids associated with showcase id
-    pkg_id_list = ShowcasePackageAssociation.get_package_ids_for_showcase(
-        validated_data_dict['showcase_id'])
-
-    pkg_list = []
-    if pkg_id_list:
-        # for each package id, get the package dict and append to list if
-        # active
-        id_list = []
-        for pkg_id in pkg_id_list:
-            id_list.append(pkg_id[0])
-        q = 'id:(' + ' OR '.join(['{0}'.format(x) for x in id_list]) + ')'
-        _pkg_list = toolkit.get_action('package_search')(
-            context,
-            {'q': q, 'rows': 100})
-        pkg_list = _pkg_list['results']
-    return pkg_list
+    fl = validated_data_dict.get('fl')
+    if fl:
+        unknown_fields = [f for f in fl if f not in PACKAGE_LIST_FIELDS]
+        if unknown_fields:
+            raise toolkit.ValidationError(
+                {'fl': ['Unknown fields: {0}'.format(
+                    ', '.join(unknown_fields))]})
+
+    # The same list is often needed more than once while rendering a page,
+    # so remember it for the rest of the request.
+    cache = get_request_cache('showcase_package_list')
+    cache_key = (validated_data_dict['showcase_id'],
+                 context.get('user'),
+                 validated_data_dict.get('offset', 0),
+                 validated_data_dict.get('limit'),
+                 tuple(fl) if fl else None)
+    if cache is not None and cache_key in cache:
+        return list(cache[cache_key])
+
+    pkg_list = list(_iter_showcase_packages(
+        context,
+        validated_data_dict['showcase_id'],
+        validated_data_dict.get('offset', 0),
+        validated_data_dict.get('limit'),
+        fl))
+
+    if cache is not None:
+        cache[cache_key] = pkg_list
+    return list(pkg_list)
 
 
 @toolkit.side_effect_free
@@ -108,17 +286,14 @@ def package_showcase_list(context, data_dict):
         validated_data_dict['package_id'])
     showcase_list = []
 
-    q = ''
-    fq = ''
     if showcase_id_list:
-        id_list = []
-        for showcase_id in showcase_id_list:
-            id_list.append(showcase_id[0])
-        fq = 'dataset_type:showcase'
-        q = 'id:(' + ' OR '.join(['{0}'.format(x) for x in id_list]) + ')'
+        id_list = [showcase_id for (showcase_id,) in showcase_id_list]
         _showcase_list = toolkit.get_action('package_search')(
             context,
-            {'q': q, 'fq': fq, 'rows': 100})
+            {'fq': 'dataset_type:showcase',
+             'fq_list': ['id:({0})'.format(
+                 ' OR '.join('"{0}"'.format(id_) for id_ in id_list))],
+             'rows': len(id_list)})
         showcase_list = _showcase_list['results']
 
     return showcase_list
@@ -3,6 +3,8 @@ import logging
 import ckan.lib.uploader as uploader
 import ckan.plugins.toolkit as toolkit
 
+from ckanext.showcase import images
+
 
 log = logging.getLogger(__name__)
 
@@ -15,6 +17,8 @@ def showcase_update(context, data_dict):
                             'image_upload', 'clear_upload')
 
     upload.upload(uploader.get_max_image_size())
+    # the smaller variants of the image are made in the background
+    images.enqueue_image_variants(upload)
 
     pkg = toolkit.get_action('package_update')(context, data_dict)
 
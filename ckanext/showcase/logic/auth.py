@@ -1,3 +1,5 @@
+import time
+
 import ckan.plugins.toolkit as toolkit
 import ckan.model as model
 
@@ -6,6 +8,10 @@ from ckanext.showcase.model import ShowcaseAdmin
 import logging
 log = logging.getLogger(__name__)
 
+# Process-local cache of the showcase admin user ids, as an
+# (expiry time, frozenset of ids) tuple.
+_showcase_admin_ids_cache = None
+
 
 def get_auth_functions():
     return {
@@ -16,6 +22,8 @@ def get_auth_functions():
         'ckanext_showcase_list': showcase_list,
         'ckanext_showcase_package_association_create': package_association_create,
         'ckanext_showcase_package_association_delete': package_association_delete,
+        'ckanext_showcase_package_association_bulk_create': package_association_bulk_create,
+        'ckanext_showcase_package_association_bulk_delete': package_association_bulk_delete,
         'ckanext_showcase_package_list': showcase_package_list,
         'ckanext_package_showcase_list': package_showcase_list,
         'ckanext_showcase_admin_add': add_showcase_admin,
@@ -25,13 +33,53 @@ def get_auth_functions():
     }
 
 
+def invalidate_showcase_admin_cache():
+    '''
+    Discard the cached showcase admin ids, eg after the list of showcase
+    admins changed.
+    '''
+    global _showcase_admin_ids_cache
+    _showcase_admin_ids_cache = None
+
+
+def _get_cached_showcase_admin_ids():
+    '''
+    Return the set of showcase admin user ids, reloading it once it is older
+    than `ckanext.showcase.admin_cache_ttl` seconds. Returns None if the cache
+    is disabled (ttl of 0).
+    '''
+    global _showcase_admin_ids_cache
+
+    ttl = toolkit.asint(
+        toolkit.config.get('ckanext.showcase.admin_cache_ttl', 60))
+    if ttl <= 0:
+        return None
+
+    now = time.monotonic()
+    cached = _showcase_admin_ids_cache
+    if cached is None or cached[0] <= now:
+        cached = (now + ttl, frozenset(ShowcaseAdmin.get_showcase_admin_ids()))
+        _showcase_admin_ids_cache = cached
+    return cached[1]
+
+
 def _is_showcase_admin(context):
     '''
     Determines whether user in context is in the showcase admin list.
     '''
-    user = context.get('user', '')
-    userobj = model.User.get(user)
-    return ShowcaseAdmin.is_user_showcase_admin(userobj)
+    userobj = context.get('auth_user_obj')
+    if userobj is None:
+        user = context.get('user')
+        if not user:
+            return False
+        userobj = model.User.get(user)
+    if userobj is None:
+        return False
+
+    admin_ids = _get_cached_showcase_admin_ids()
+    if admin_ids is None:
+        return ShowcaseAdmin.is_user_showcase_admin(userobj)
+    return userobj.id in admin_ids
 
 
 def create(context, data_dict):
@@ -88,6 +136,24 @@ def package_association_delete(context, data_dict):
     return {'success': _is_showcase_admin(context)}
 
 
+def package_association_bulk_create(context, data_dict):
+    '''Create many package showcase associations at once.
+
+       Only sysadmins or user listed as Showcase Admins can create
+       package/showcase associations.
+    '''
+    return {'success': _is_showcase_admin(context)}
+
+
+def package_association_bulk_delete(context, data_dict):
+    '''Delete many package showcase associations at once.
+
+       Only sysadmins or user listed as Showcase Admins can delete
+       package/showcase associations.
+    '''
+    return {'success': _is_showcase_admin(context)}
+
+
 @toolkit.auth_allow_anonymous_access
 def showcase_package_list(context, data_dict):
     '''All users can access a showcase's package list'''
@@ -0,0 +1,32 @@
+'''
+Request-scoped caches, so repeating the same lookup while handling a single
+web request only reaches the database or Solr once.
+'''
+import flask
+
+import ckan.plugins.toolkit as tk
+
+
+def get_request_cache(name):
+    '''
+    Return the dict named `name` that lives as long as the current request,
+    or None when not handling a request (eg in CLI commands), in which case
+    nothing should be cached.
+    '''
+    if not flask.has_request_context():
+        return None
+    try:
+        caches = tk.g.showcase_request_caches
+    except AttributeError:
+        caches = tk.g.showcase_request_caches = {}
+    return caches.setdefault(name, {})
+
+
+def clear_request_cache(name):
+    '''
+    Empty the request-scoped cache named `name`, eg after the data it holds
+    changed.
+    '''
+    cache = get_request_cache(name)
+    if cache is not None:
+        cache.clear()
@@ -1,7 +1,8 @@
-import ckan.model as model
 import ckan.lib.navl.dictization_functions as df
 from ckan.common import _
 
+from ckanext.showcase.logic.validators import resolve_package_name_or_id
+
 
 def convert_package_name_or_id_to_title_or_name(package_name_or_id, context):
     '''
@@ -14,12 +15,8 @@ def convert_package_name_or_id_to_title_or_name(package_name_or_id, context):
         package with the given name or id
 
     '''
-    session = context['session']
-    result = session.query(model.Package).filter_by(
-            id=package_name_or_id).first()
-    if not result:
-        result = session.query(model.Package).filter_by(
-                name=package_name_or_id).first()
+    result = resolve_package_name_or_id(package_name_or_id, context)
     if not result:
         raise df.Invalid('%s: %s' % (_('Not found'), _('Dataset')))
-    return result.title or result.name
+    package_id, package_type, title, name = result
+    return title or name
@@ -1,6 +1,30 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+
+import ckan.model as model
 import ckan.lib.helpers as h
+from ckan.lib.redis import connect_to_redis
 from ckan.plugins import toolkit as tk
 
+log = logging.getLogger(__name__)
+
+# In-process fallback cache of the site statistics, used when Redis is not
+# available, as an (expiry time, stats) tuple.
+_site_statistics_cache = None
+
+# Created on first use, see _get_rendered_notes_cache()
+_rendered_notes_cache = None
+
+# default length of the notes extract shown by showcase_item.html, which is
+# precomputed for the showcases listed in search results
+NOTES_EXTRACT_LENGTH = 180
+
 
 def facet_remove_field(key, value=None, replace=None):
     '''
@@ -18,19 +42,152 @@ def get_site_statistics():
     '''
     Custom stats helper, so we can get the correct number of packages, and a
     count of showcases.
+
+    The statistics are cached in Redis (or in the current process if Redis is
+    not available) for `ckanext.showcase.stats_cache_ttl` seconds.
     '''
+    ttl = tk.asint(tk.config.get('ckanext.showcase.stats_cache_ttl', 300))
+    if ttl <= 0:
+        return _get_site_statistics()
+
+    stats = _get_cached_site_statistics()
+    if stats is None:
+        stats = _get_site_statistics()
+        _cache_site_statistics(stats, ttl)
+    return stats
 
+
+def _get_site_statistics():
     stats = {}
     stats['showcase_count'] = tk.get_action('package_search')(
-        {}, {"rows": 1, 'fq': '+dataset_type:showcase'})['count']
+        {}, {"rows": 0, 'fq': '+dataset_type:showcase'})['count']
     stats['dataset_count'] = tk.get_action('package_search')(
-        {}, {"rows": 1, 'fq': '!dataset_type:showcase'})['count']
-    stats['group_count'] = len(tk.get_action('group_list')({}, {}))
-    stats['organization_count'] = len(
-        tk.get_action('organization_list')({}, {}))
+        {}, {"rows": 0, 'fq': '!dataset_type:showcase'})['count']
+    stats['group_count'] = _count_groups('group', is_organization=False)
+    stats['organization_count'] = _count_groups('organization',
+                                                is_organization=True)
 
     return stats
 
 
+def _count_groups(group_type, is_organization):
+    '''
+    Count the active groups listed by group_list or organization_list.
+    '''
+    return model.Session.query(model.Group.id) \
+        .filter(model.Group.state == 'active') \
+        .filter(model.Group.type == group_type) \
+        .filter(model.Group.is_organization == is_organization) \
+        .count()
+
+
+def _site_statistics_cache_key():
+    return '{0}:ckanext-showcase:site_statistics'.format(
+        tk.config.get('ckan.site_id'))
+
+
+def _get_cached_site_statistics():
+    try:
+        cached = connect_to_redis().get(_site_statistics_cache_key())
+    except RedisError:
+        log.debug('Redis not available, using in-process stats cache')
+        cached = _site_statistics_cache
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+    return json.loads(cached) if cached is not None else None
+
+
+def _cache_site_statistics(stats, ttl):
+    global _site_statistics_cache
+    try:
+        connect_to_redis().setex(_site_statistics_cache_key(), ttl,
+                                 json.dumps(stats))
+    except RedisError:
+        _site_statistics_cache = (time.monotonic() + ttl, stats)
+
+
+def clear_site_statistics_cache():
+    '''
+    Discard the cached site statistics.
+    '''
+    global _site_statistics_cache
+    _site_statistics_cache = None
+    try:
+        connect_to_redis().delete(_site_statistics_cache_key())
+    except RedisError:
+        pass
+
+
+class RenderedNotesCache(object):
+    '''
+    A bounded, least recently used cache of rendered showcase notes, keyed by
+    a hash of the notes text. Counts its hits and misses.
+    '''
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, notes, render):
+        '''
+        Return the rendered notes, calling render(notes) on a cache miss.
+        '''
+        key = hashlib.sha256(notes.encode('utf8')).hexdigest()
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        rendered = render(notes)
+
+        with self._lock:
+            self._items[key] = rendered
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return rendered
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._items), 'maxsize': self.maxsize}
+
+
+def _get_rendered_notes_cache():
+    global _rendered_notes_cache
+    if _rendered_notes_cache is None:
+        _rendered_notes_cache = RenderedNotesCache(tk.asint(
+            tk.config.get('ckanext.showcase.notes_cache_size', 1000)))
+    return _rendered_notes_cache
+
+
+def render_showcase_notes(notes):
+    '''
+    Render the markdown notes of a showcase to HTML, reusing the result of
+    earlier renders of the same text (up to
+    `ckanext.showcase.notes_cache_size` of them, 0 disables the cache).
+    '''
+    cache = _get_rendered_notes_cache()
+    if not notes or cache.maxsize <= 0:
+        return h.render_markdown(notes)
+    return cache.get(notes, h.render_markdown)
+
+
+def get_rendered_notes_cache_info():
+    '''
+    Return the hits, misses, size and maxsize of the rendered notes cache of
+    the current process.
+    '''
+    return _get_rendered_notes_cache().info()
+
+
 def showcase_get_wysiwyg_editor():
     return tk.config.get('ckanext.showcase.editor', '')
+
+
+def showcase_notes_extract_length():
+    return NOTES_EXTRACT_LENGTH
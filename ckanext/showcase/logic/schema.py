@@ -19,6 +19,10 @@ empty = toolkit.get_validator("empty")
 if_empty_same_as = toolkit.get_validator("if_empty_same_as")
 ignore_missing = toolkit.get_validator("ignore_missing")
 ignore = toolkit.get_validator("ignore")
+natural_number_validator = toolkit.get_validator("natural_number_validator")
+list_of_strings = toolkit.get_validator("list_of_strings")
+convert_to_list_if_string = toolkit.get_converter("convert_to_list_if_string")
+boolean_validator = toolkit.get_validator("boolean_validator")
 keep_extras = toolkit.get_validator("keep_extras")
 
 package_id_not_changed = toolkit.get_validator("package_id_not_changed")
@@ -119,6 +123,18 @@ def showcase_show_schema():
     return schema
 
 
+def showcase_list_schema():
+    schema = {
+        'fields': [ignore_missing, convert_to_list_if_string,
+                   list_of_strings],
+        'limit': [ignore_missing, natural_number_validator],
+        'offset': [ignore_missing, natural_number_validator],
+        'sort': [ignore_missing, unicode_safe],
+        'include_count': [ignore_missing, boolean_validator],
+    }
+    return schema
+
+
 def showcase_package_association_create_schema():
     schema = {
         'package_id': [not_empty, unicode_safe,
@@ -133,14 +149,30 @@ def showcase_package_association_delete_schema():
     return showcase_package_association_create_schema()
 
 
-def showcase_package_list_schema():
+def showcase_package_association_bulk_create_schema():
     schema = {
+        'package_ids': [not_empty, list_of_strings],
         'showcase_id': [not_empty, unicode_safe,
                         convert_package_name_or_id_to_id_for_type_showcase]
     }
     return schema
 
 
+def showcase_package_association_bulk_delete_schema():
+    return showcase_package_association_bulk_create_schema()
+
+
+def showcase_package_list_schema():
+    schema = {
+        'showcase_id': [not_empty, unicode_safe,
+                        convert_package_name_or_id_to_id_for_type_showcase],
+        'limit': [ignore_missing, natural_number_validator],
+        'offset': [ignore_missing, natural_number_validator],
+        'fl': [ignore_missing, convert_to_list_if_string, list_of_strings],
+    }
+    return schema
+
+
 def package_showcase_list_schema():
     schema = {
         'package_id': [not_empty, unicode_safe,
@@ -1,9 +1,49 @@
+from sqlalchemy import or_
+
+import ckan.model as model
 from ckan.plugins import toolkit as tk
 
+from ckanext.showcase.logic.cache import get_request_cache
+
 _ = tk._
 Invalid = tk.Invalid
 
 
+def resolve_package_name_or_id(package_name_or_id, context):
+    '''
+    Look up the package with the given name or id, with a single query.
+
+    Packages that were found are remembered for the rest of the request, so
+    validating the same showcase or dataset again (eg for every dataset of a
+    bulk action) doesn't go back to the database.
+
+    :returns: a (id, type, title, name) tuple, or None if there is no package
+        with the given name or id
+    :rtype: tuple
+    '''
+    cache = get_request_cache('package_name_or_id')
+    if cache is not None and package_name_or_id in cache:
+        return cache[package_name_or_id]
+
+    session = context['session']
+    rows = session.query(model.Package.id,
+                         model.Package.type,
+                         model.Package.title,
+                         model.Package.name) \
+        .filter(or_(model.Package.id == package_name_or_id,
+                    model.Package.name == package_name_or_id)).all()
+    if not rows:
+        return None
+
+    # ids take precedence over names
+    row = next((row for row in rows if row.id == package_name_or_id),
+               rows[0])
+    result = (row.id, row.type, row.title, row.name)
+    if cache is not None:
+        cache[package_name_or_id] = cache[row.id] = result
+    return result
+
+
 def convert_package_name_or_id_to_id_for_type(package_name_or_id,
                                               context, package_type='dataset'):
     '''
@@ -18,16 +58,10 @@ def convert_package_name_or_id_to_id_for_type(package_name_or_id,
         package with the given name or id
 
     '''
-    session = context['session']
-    model = context['model']
-    result = session.query(model.Package) \
-        .filter_by(id=package_name_or_id, type=package_type).first()
-    if not result:
-        result = session.query(model.Package) \
-            .filter_by(name=package_name_or_id, type=package_type).first()
-    if not result:
+    result = resolve_package_name_or_id(package_name_or_id, context)
+    if not result or result[1] != package_type:
         raise Invalid('%s: %s' % (_('Not found'), _('Dataset')))
-    return result.id
+    return result[0]
 
 
 def convert_package_name_or_id_to_id_for_type_dataset(package_name_or_id,
@@ -42,3 +76,49 @@ def convert_package_name_or_id_to_id_for_type_showcase(package_name_or_id,
     return convert_package_name_or_id_to_id_for_type(package_name_or_id,
                                                      context,
                                                      package_type='showcase')
+
+
+def resolve_package_names_or_ids(package_names_or_ids, context,
+                                 package_type='dataset'):
+    '''
+    Resolve many package names or ids of packages of type package_type with
+    a single query, like `resolve_package_name_or_id` does for one, sharing
+    its request-scoped cache.
+
+    :returns: a dict mapping each given name or id that was found to a
+        (id, title or name) tuple. Names or ids that weren't found are left
+        out.
+    :rtype: dict
+    '''
+    names_or_ids = set(package_names_or_ids)
+    if not names_or_ids:
+        return {}
+
+    cache = get_request_cache('package_name_or_id')
+    found = {}
+    if cache is not None:
+        found = {name_or_id: cache[name_or_id]
+                 for name_or_id in names_or_ids if name_or_id in cache}
+
+    missing = names_or_ids - set(found)
+    if missing:
+        session = context['session']
+        rows = session.query(model.Package.id,
+                             model.Package.type,
+                             model.Package.title,
+                             model.Package.name) \
+            .filter(or_(model.Package.id.in_(missing),
+                        model.Package.name.in_(missing))).all()
+
+        # ids take precedence over names, as in resolve_package_name_or_id
+        for key_index in (3, 0):
+            for row in rows:
+                if row[key_index] in missing:
+                    found[row[key_index]] = tuple(row)
+        if cache is not None:
+            cache.update(found)
+            cache.update((row.id, tuple(row)) for row in rows)
+
+    return {name_or_id: (package_id, title or name)
+            for name_or_id, (package_id, type_, title, name) in found.items()
+            if type_ == package_type}
@@ -0,0 +1,34 @@
+"""Add showcase_id index to showcase_package_association
+
+Revision ID: 5d9f1a3c7b21
+Revises: 02b006cb222c
+Create Date: 2026-10-18 09:12:40.511204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5d9f1a3c7b21"
+down_revision = "02b006cb222c"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "showcase_package_association_showcase_id_package_id_idx"
+
+
+def upgrade():
+    engine = op.get_bind()
+    inspector = sa.inspect(engine)
+    indexes = inspector.get_indexes("showcase_package_association")
+    if INDEX_NAME not in [index["name"] for index in indexes]:
+        op.create_index(
+            INDEX_NAME,
+            "showcase_package_association",
+            ["showcase_id", "package_id"],
+        )
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name="showcase_package_association")
@@ -1,7 +1,11 @@
-from sqlalchemy import Column, ForeignKey, types
+from sqlalchemy import Column, ForeignKey, Index, exists, func, types
+from sqlalchemy.exc import IntegrityError
 
 from ckan.model.domain_object import DomainObject
 from ckan.model.meta import Session
+from ckan.model.group import Group
+from ckan.model.package import Package
+from ckan.model.resource import Resource
 
 import logging
 
@@ -45,6 +49,15 @@ class ShowcaseBaseModel(DomainObject):
 class ShowcasePackageAssociation(ShowcaseBaseModel, BaseModel):
 
     __tablename__ = "showcase_package_association"
+    __table_args__ = (
+        # The primary key leads with package_id, so lookups by showcase_id
+        # need their own index.
+        Index(
+            "showcase_package_association_showcase_id_package_id_idx",
+            "showcase_id",
+            "package_id",
+        ),
+    )
 
     package_id = Column(
         types.UnicodeText,
@@ -79,6 +92,154 @@ class ShowcasePackageAssociation(ShowcaseBaseModel, BaseModel):
         )
         return showcase_package_association_list
 
+    @classmethod
+    def get_associated_package_ids(cls, showcase_id, package_ids):
+        """
+        Return the set of the passed package_ids that are associated with the
+        passed showcase_id.
+        """
+        if not package_ids:
+            return set()
+        q = (
+            Session.query(cls.package_id)
+            .filter(cls.showcase_id == showcase_id)
+            .filter(cls.package_id.in_(package_ids))
+        )
+        return {package_id for (package_id,) in q}
+
+    @classmethod
+    def create_many(cls, showcase_id, package_ids):
+        """
+        Associate each of the passed package_ids with the passed showcase_id,
+        using a single multi-row INSERT statement, and return the list of the
+        package_ids that were associated.
+
+        If the INSERT fails, eg because another request associated one of the
+        packages in the meantime, the packages are associated one at a time
+        and those that fail are left out of the returned list.
+        """
+        if not package_ids:
+            return []
+        try:
+            Session.execute(
+                cls.__table__.insert().values(
+                    [
+                        {"package_id": package_id, "showcase_id": showcase_id}
+                        for package_id in package_ids
+                    ]
+                )
+            )
+            Session.commit()
+            return list(package_ids)
+        except IntegrityError:
+            Session.rollback()
+
+        created = []
+        for package_id in package_ids:
+            try:
+                with Session.begin_nested():
+                    Session.execute(
+                        cls.__table__.insert().values(
+                            package_id=package_id, showcase_id=showcase_id
+                        )
+                    )
+            except IntegrityError:
+                log.debug(
+                    "Could not associate package %s with showcase %s",
+                    package_id,
+                    showcase_id,
+                )
+                continue
+            created.append(package_id)
+        Session.commit()
+        return created
+
+    @classmethod
+    def delete_many(cls, showcase_id, package_ids):
+        """
+        Delete the associations between the passed showcase_id and each of the
+        passed package_ids, using a single DELETE statement.
+        """
+        if not package_ids:
+            return
+        Session.query(cls).filter(cls.showcase_id == showcase_id).filter(
+            cls.package_id.in_(package_ids)
+        ).delete(synchronize_session=False)
+        Session.commit()
+
+    @classmethod
+    def _package_counts_query(cls):
+        """
+        Return a query of (showcase_id, number of active, public packages)
+        rows, grouped by showcase_id.
+        """
+        return (
+            Session.query(
+                cls.showcase_id, func.count(cls.package_id).label("num_datasets")
+            )
+            .join(Package, Package.id == cls.package_id)
+            .filter(Package.state == "active")
+            .filter(Package.private == False)  # noqa: E712
+            .group_by(cls.showcase_id)
+        )
+
+    @classmethod
+    def get_package_counts_for_showcases(cls, showcase_ids):
+        """
+        Return a dict mapping each of the passed showcase_ids to the number of
+        active, public packages associated with it, using a single grouped
+        query.
+        """
+        counts = dict.fromkeys(showcase_ids, 0)
+        if not counts:
+            return counts
+
+        q = cls._package_counts_query().filter(cls.showcase_id.in_(list(counts)))
+        counts.update(q.all())
+        return counts
+
+    @classmethod
+    def get_package_organizations_and_formats(cls, showcase_id):
+        """
+        Return the sorted names of the organizations, and the sorted formats
+        of the resources, of the active, public packages associated with the
+        passed showcase_id.
+        """
+        packages = (
+            Session.query(cls.package_id)
+            .join(Package, Package.id == cls.package_id)
+            .filter(cls.showcase_id == showcase_id)
+            .filter(Package.state == "active")
+            .filter(Package.private == False)  # noqa: E712
+            .subquery()
+        )
+        organizations = (
+            Session.query(Group.name)
+            .join(Package, Package.owner_org == Group.id)
+            .filter(Package.id.in_(Session.query(packages.c.package_id)))
+            .distinct()
+        )
+        formats = (
+            Session.query(Resource.format)
+            .filter(Resource.package_id.in_(Session.query(packages.c.package_id)))
+            .filter(Resource.state == "active")
+            .filter(Resource.format != "")
+            .filter(Resource.format.isnot(None))
+            .distinct()
+        )
+        return (
+            sorted(name for (name,) in organizations),
+            sorted(res_format for (res_format,) in formats),
+        )
+
+    @classmethod
+    def get_package_counts_subquery(cls):
+        """
+        Return a subquery with showcase_id and num_datasets columns, to join
+        showcases with their number of active, public packages.
+        """
+        return cls._package_counts_query().subquery()
+
 
 class ShowcaseAdmin(ShowcaseBaseModel, BaseModel):
     __tablename__ = "showcase_admin"
@@ -103,4 +264,4 @@ class ShowcaseAdmin(ShowcaseBaseModel, BaseModel):
         """
         Determine whether passed user is in the showcase admin list.
         """
-        return user.id in cls.get_showcase_admin_ids()
+        return Session.query(exists().where(cls.user_id == user.id)).scalar()
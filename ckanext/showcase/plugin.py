@@ -9,12 +9,18 @@ import ckan.plugins as plugins
 import ckan.plugins.toolkit as tk
 import ckan.lib.plugins as lib_plugins
 import ckan.lib.helpers as h
+import ckan.model as model
 
 
 from ckanext.showcase import cli
+from ckanext.showcase import images
+from ckanext.showcase import jobs
+from ckanext.showcase import storage
 from ckanext.showcase import utils
 from ckanext.showcase import views
 from ckanext.showcase.logic import auth, action
+from ckanext.showcase.logic.cache import get_request_cache
+from ckanext.showcase.model import ShowcasePackageAssociation
 
 import ckanext.showcase.logic.schema as showcase_schema
 import ckanext.showcase.logic.helpers as showcase_helpers
@@ -25,6 +31,9 @@ log = logging.getLogger(__name__)
 
 DATASET_TYPE_NAME = utils.DATASET_TYPE_NAME
 
+# used by showcase_item.html when a showcase has no image
+IMAGE_PLACEHOLDER = '/base/images/placeholder-group.png'
+
 
 class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
     plugins.implements(plugins.IConfigurer)
@@ -37,6 +46,8 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
     plugins.implements(plugins.ITranslation)
     plugins.implements(plugins.IBlueprint)
     plugins.implements(plugins.IClick)
+    plugins.implements(plugins.IUploader, inherit=True)
+    plugins.implements(plugins.IMiddleware, inherit=True)
 
     # IBlueprint
 
@@ -48,6 +59,16 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
     def get_commands(self):
         return cli.get_commands()
 
+    # IUploader
+
+    def get_uploader(self, upload_to, old_filename=None):
+        return storage.get_uploader(upload_to, old_filename)
+
+    # IMiddleware
+
+    def make_middleware(self, app, config):
+        return utils.UploadSizeLimitMiddleware(app)
+
     # IConfigurer
 
     def update_config(self, config):
@@ -94,15 +115,22 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
             'facet_remove_field': showcase_helpers.facet_remove_field,
             'get_site_statistics': showcase_helpers.get_site_statistics,
             'showcase_get_wysiwyg_editor': showcase_helpers.showcase_get_wysiwyg_editor,
+            'showcase_notes_extract_length': showcase_helpers.showcase_notes_extract_length,
         }
 
     # IFacets
 
     def dataset_facets(self, facets_dict, package_type):
-        '''Only show tags for Showcase search list.'''
+        '''Only show tags, and facets on their datasets, for Showcase search
+        list.'''
         if package_type != DATASET_TYPE_NAME:
             return facets_dict
-        return OrderedDict({'tags': _('Tags')})
+        return OrderedDict([
+            ('tags', _('Tags')),
+            (utils.ORGANIZATIONS_INDEX_FIELD, _('Dataset Organizations')),
+            (utils.RES_FORMATS_INDEX_FIELD, _('Dataset Formats')),
+            (utils.NUM_DATASETS_INDEX_FIELD, _('Number of Datasets')),
+        ])
 
     # IAuthFunctions
 
@@ -116,8 +144,33 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
 
     # IPackageController
 
-    def _add_to_pkg_dict(self, context, pkg_dict):
-        '''Add key/values to pkg_dict and return it.'''
+    def _include_showcase_extras(self, context):
+        '''Whether to add the dataset count and rendered notes to a showcase.
+
+        Callers can decide with the `showcase_extras` context key. Otherwise,
+        unless `ckanext.showcase.enrich_internal_calls` is set to false, they
+        are always added; if it is, they are only added for the outermost
+        calls, rendering a page (`for_view`) or answering an API request
+        (`api_version`).
+        '''
+        include = context.get('showcase_extras')
+        if include is not None:
+            return tk.asbool(include)
+        if tk.asbool(tk.config.get('ckanext.showcase.enrich_internal_calls',
+                                   True)):
+            return True
+        return bool(context.get('for_view') or context.get('api_version'))
+
+    def _add_to_pkg_dict(self, context, pkg_dict, with_num_datasets=True):
+        '''Add key/values to pkg_dict and return it.
+
+        The dataset count is left out when `with_num_datasets` is False, so
+        callers handling many showcases at once can add it in a single query
+        (see `after_dataset_search`), or when the `showcase_count_datasets`
+        context key is False, for callers that fetch the showcase datasets
+        anyway and can count them. Neither the count nor the rendered notes
+        are added if `_include_showcase_extras` says so.
+        '''
 
         if pkg_dict['type'] != 'showcase':
             return pkg_dict
@@ -133,18 +186,26 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
                                  .format(DATASET_TYPE_NAME,
                                          pkg_dict.get('image_url')),
                                  qualified=True)
+            pkg_dict['image_thumbnail_url'] = images.image_variant_url(
+                image_url, 'thumbnail')
+            pkg_dict['image_card_url'] = images.image_variant_url(
+                image_url, 'card')
+
+        if not self._include_showcase_extras(context):
+            return pkg_dict
 
         # Add dataset count
-        pkg_dict['num_datasets'] = len(
-            tk.get_action('ckanext_showcase_package_list')(
-                context, {'showcase_id': pkg_dict['id']}))
+        if with_num_datasets and context.get('showcase_count_datasets', True):
+            pkg_dict['num_datasets'] = \
+                ShowcasePackageAssociation.get_package_counts_for_showcases(
+                    [pkg_dict['id']])[pkg_dict['id']]
 
         # Rendered notes
         if showcase_helpers.showcase_get_wysiwyg_editor() == 'ckeditor':
             pkg_dict['showcase_notes_formatted'] = pkg_dict['notes']
         else:
             pkg_dict['showcase_notes_formatted'] = \
-                h.render_markdown(pkg_dict['notes'])
+                showcase_helpers.render_showcase_notes(pkg_dict['notes'])
 
         return pkg_dict
 
@@ -153,11 +214,42 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
         '''Modify package_show pkg_dict.'''
         pkg_dict = self._add_to_pkg_dict(context, pkg_dict)
 
+    def _add_view_fields(self, pkg_dict):
+        '''Add the values `showcase_item.html` needs, so listing many
+        showcases doesn't build the same urls and extracts in the template.
+        '''
+        if pkg_dict.get('type') != DATASET_TYPE_NAME:
+            return pkg_dict
+
+        # the placeholder is the same for every showcase on the page
+        urls = get_request_cache('showcase_urls')
+        if urls is not None and 'placeholder' in urls:
+            placeholder = urls['placeholder']
+        else:
+            placeholder = h.url_for_static(IMAGE_PLACEHOLDER)
+            if urls is not None:
+                urls['placeholder'] = placeholder
+
+        pkg_dict['showcase_read_url'] = h.url_for(
+            'showcase_blueprint.read', id=pkg_dict['name'])
+        pkg_dict['showcase_image_src'] = pkg_dict.get('image_thumbnail_url') \
+            or pkg_dict.get('image_display_url') or placeholder
+        pkg_dict['showcase_notes_extract'] = h.markdown_extract(
+            pkg_dict.get('notes'),
+            extract_length=showcase_helpers.NOTES_EXTRACT_LENGTH)
+        return pkg_dict
+
     def before_dataset_view(self, pkg_dict):
-        '''Modify pkg_dict that is sent to templates.'''
-        context = {'user': tk.g.user or tk.g.author}
+        '''Modify pkg_dict that is sent to templates.
+
+        The dataset count is added afterwards by `after_dataset_show` or
+        `after_dataset_search`.
+        '''
+        context = {'user': tk.g.user or tk.g.author, 'for_view': True}
 
-        return self._add_to_pkg_dict(context, pkg_dict)
+        pkg_dict = self._add_to_pkg_dict(context, pkg_dict,
+                                         with_num_datasets=False)
+        return self._add_view_fields(pkg_dict)
 
     def before_dataset_search(self, search_params):
         '''
@@ -171,6 +263,85 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
             search_params.update({'fq': fq + " -" + filter})
         return search_params
 
+    def before_dataset_index(self, pkg_dict):
+        '''
+        Index the ids of the showcases a dataset belongs to, so showcase
+        membership can be queried with a single filter query.
+
+        Showcases are indexed with their number of datasets, and with the
+        organizations and resource formats of their datasets, to facet and
+        sort on.
+        '''
+        if pkg_dict.get('type') == DATASET_TYPE_NAME:
+            showcase_id = pkg_dict['id']
+            num_datasets = \
+                ShowcasePackageAssociation.get_package_counts_for_showcases(
+                    [showcase_id])[showcase_id]
+            organizations, res_formats = ShowcasePackageAssociation\
+                .get_package_organizations_and_formats(showcase_id)
+            pkg_dict[utils.NUM_DATASETS_INDEX_FIELD] = \
+                utils.format_num_datasets_for_index(num_datasets)
+            if organizations:
+                pkg_dict[utils.ORGANIZATIONS_INDEX_FIELD] = organizations
+            if res_formats:
+                pkg_dict[utils.RES_FORMATS_INDEX_FIELD] = res_formats
+            return pkg_dict
+
+        showcase_ids = [
+            showcase_id for (showcase_id,) in
+            ShowcasePackageAssociation.get_showcase_ids_for_package(
+                pkg_dict['id'])]
+        if showcase_ids:
+            pkg_dict[utils.SHOWCASE_IDS_INDEX_FIELD] = showcase_ids
+        return pkg_dict
+
+    def after_dataset_search(self, search_results, search_params):
+        '''
+        Add the dataset count to every showcase in the search results, using
+        one grouped query for the whole page of results.
+        '''
+        showcases = [pkg_dict for pkg_dict in search_results.get('results', [])
+                     if isinstance(pkg_dict, dict)
+                     and pkg_dict.get('type') == DATASET_TYPE_NAME
+                     and pkg_dict.get('id')]
+        if showcases:
+            counts = \
+                ShowcasePackageAssociation.get_package_counts_for_showcases(
+                    [pkg_dict['id'] for pkg_dict in showcases])
+            for pkg_dict in showcases:
+                pkg_dict['num_datasets'] = counts[pkg_dict['id']]
+
+        # show the number of datasets facet without its padding
+        num_datasets_facet = search_results.get('search_facets', {}).get(
+            utils.NUM_DATASETS_INDEX_FIELD)
+        if num_datasets_facet:
+            for item in num_datasets_facet.get('items', []):
+                item['display_name'] = item['name'].lstrip('0') or '0'
+        return search_results
+
+    def _reindex_showcases_of(self, name_or_id):
+        '''
+        Reindex the showcases of a changed dataset once the change is
+        committed, as their search index documents describe it.
+        '''
+        if not name_or_id or not jobs.reindex_on_dataset_change_enabled():
+            return
+        pkg = model.Package.get(name_or_id)
+        if pkg and pkg.type != DATASET_TYPE_NAME:
+            jobs.reindex_showcases_after_commit(pkg.id)
+
+    def after_dataset_update(self, context, pkg_dict):
+        '''
+        Reindex the showcases of the updated dataset in the background.
+        '''
+        self._reindex_showcases_of(pkg_dict.get('id') or pkg_dict.get('name'))
+
+    def after_dataset_delete(self, context, pkg_dict):
+        '''
+        Reindex the showcases of the deleted dataset in the background.
+        '''
+        self._reindex_showcases_of(pkg_dict.get('id'))
+
     # CKAN < 2.10 (Remove when dropping support for 2.9)
     def after_show(self, context, pkg_dict):
         '''Modify package_show pkg_dict.'''
@@ -188,6 +359,30 @@ class ShowcasePlugin(plugins.SingletonPlugin, lib_plugins.DefaultDatasetForm):
         '''
         return self.before_dataset_search(search_params)
 
+    def before_index(self, pkg_dict):
+        '''
+        Index the ids of the showcases a dataset belongs to.
+        '''
+        return self.before_dataset_index(pkg_dict)
+
+    def after_search(self, search_results, search_params):
+        '''
+        Add the dataset count to every showcase in the search results.
+        '''
+        return self.after_dataset_search(search_results, search_params)
+
+    def after_update(self, context, pkg_dict):
+        '''
+        Reindex the showcases of the updated dataset in the background.
+        '''
+        return self.after_dataset_update(context, pkg_dict)
+
+    def after_delete(self, context, pkg_dict):
+        '''
+        Reindex the showcases of the deleted dataset in the background.
+        '''
+        return self.after_dataset_delete(context, pkg_dict)
+
     # ITranslation
     def i18n_directory(self):
         '''Change the directory of the *.mo translation files
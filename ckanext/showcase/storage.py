@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+'''
+Optional content-addressed storage of the showcase images.
+
+When ``ckanext.showcase.content_addressed_storage`` is enabled, uploaded
+showcase images are stored under the SHA-256 digest of their contents, so
+uploading the same image again (eg to another showcase) reuses the file
+already on disk. As a file's name changes whenever its contents do, these
+files can be served with long-lived immutable cache headers.
+'''
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+
+import magic
+
+import ckan.lib.uploader as uploader
+import ckan.plugins.toolkit as tk
+
+log = logging.getLogger(__name__)
+
+# the object types of the showcase uploads (see `get_uploader` calls)
+UPLOAD_TYPES = ('showcase', 'showcase_image')
+
+CHUNK_SIZE = 2 ** 16
+MB = 2 ** 20
+
+# accepted when the site doesn't configure the allowed upload types, as the
+# files are served from the site's origin with immutable cache headers
+DEFAULT_MIMETYPES = ('image/png', 'image/gif', 'image/jpeg', 'image/webp')
+
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+_content_addressed_path = re.compile(
+    r'^/uploads/(?:{0})/(?:variants/)?[0-9a-f]{{64}}(?:\.[\w.]+)?$'.format(
+        '|'.join(UPLOAD_TYPES)))
+
+
+def content_addressed_storage_enabled():
+    return tk.asbool(
+        tk.config.get('ckanext.showcase.content_addressed_storage', False))
+
+
+class ContentAddressedUpload(uploader.Upload):
+    '''
+    Uploader storing files under the digest of their contents.
+
+    The digest is computed while the upload is streamed to a temporary file,
+    which is then moved to its final name, or discarded if a file with the
+    same contents is stored already. As files may be shared by several
+    showcases, replaced or cleared files are never deleted.
+    '''
+    content_addressed = True
+
+    def update_data_dict(self, data_dict, url_field, file_field, clear_field):
+        super(ContentAddressedUpload, self).update_data_dict(
+            data_dict, url_field, file_field, clear_field)
+        # the final file name is only known once the file has been read
+        self._data_dict = data_dict
+        self._url_field = url_field
+
+    def _verified_extension(self):
+        '''
+        Check the type of the upload from its contents and return the file
+        extension of that type, ignoring the name given by the client.
+        '''
+        self.verify_type()
+
+        mimetype = magic.from_buffer(self.upload_file.read(2048), mime=True)
+        self.upload_file.seek(0)
+        configured = any(
+            tk.config.get('ckan.upload.{0}.{1}'.format(self.object_type, key))
+            for key in ('mimetypes', 'types'))
+        if not configured and mimetype not in DEFAULT_MIMETYPES:
+            raise tk.ValidationError({self.file_field: [
+                'Unsupported upload type: {0}'.format(mimetype)]})
+        return mimetypes.guess_extension(mimetype) or ''
+
+    def upload(self, max_size=2):
+        if not self.filename:
+            return
+        assert self.upload_file and self.filepath
+
+        extension = self._verified_extension()
+        digest = hashlib.sha256()
+        try:
+            with open(self.tmp_filepath, 'wb+') as output_file:
+                self.upload_file.seek(0)
+                size = 0
+                while True:
+                    data = self.upload_file.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    size += len(data)
+                    if size > max_size * MB:
+                        raise tk.ValidationError(
+                            {self.file_field: ['File upload too large']})
+                    digest.update(data)
+                    output_file.write(data)
+        except tk.ValidationError:
+            os.remove(self.tmp_filepath)
+            raise
+        finally:
+            self.upload_file.close()
+
+        self.filename = digest.hexdigest() + extension
+        self.filepath = os.path.join(self.storage_path, self.filename)
+        if os.path.exists(self.filepath):
+            log.debug('Reusing stored showcase upload %s', self.filename)
+            os.remove(self.tmp_filepath)
+        else:
+            os.rename(self.tmp_filepath, self.filepath)
+        self._data_dict[self._url_field] = self.filename
+
+
+def get_uploader(upload_to, old_filename=None):
+    '''
+    Return a content-addressed uploader for the showcase uploads if enabled,
+    or None to use the default one.
+    '''
+    if upload_to in UPLOAD_TYPES and content_addressed_storage_enabled():
+        return ContentAddressedUpload(upload_to, old_filename)
+    return None
+
+
+def add_cache_headers(response):
+    '''
+    Let clients and proxies cache content-addressed showcase uploads for a
+    year without revalidating them.
+    '''
+    if response.status_code == 200 \
+            and content_addressed_storage_enabled() \
+            and _content_addressed_path.match(tk.request.path):
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -204,6 +204,117 @@ class TestCreateShowcasePackageAssociation(object):
             )
 
 
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_session")
+class TestCreateShowcasePackageAssociationBulk(object):
+    def test_association_bulk_create(self):
+        """
+        Calling bulk create with a showcase and package ids and names creates
+        an association for each package.
+        """
+        sysadmin = factories.Sysadmin()
+        package_one = factories.Dataset()
+        package_two = factories.Dataset()
+        showcase = factories.Dataset(type="showcase")
+
+        context = {"user": sysadmin["name"]}
+        result = helpers.call_action(
+            "ckanext_showcase_package_association_bulk_create",
+            context=context,
+            showcase_id=showcase["name"],
+            package_ids=[package_one["id"], package_two["name"]],
+        )
+
+        assert sorted(result["created"]) == sorted(
+            [package_one["id"], package_two["id"]]
+        )
+        assert result["errors"] == {}
+        assert (
+            model.Session.query(ShowcasePackageAssociation)
+            .filter_by(showcase_id=showcase["id"])
+            .count()
+            == 2
+        )
+
+    def test_association_bulk_create_reports_errors(self):
+        """
+        Packages that don't exist or are already in the showcase are reported
+        as errors, the others are still added.
+        """
+        sysadmin = factories.Sysadmin()
+        package_one = factories.Dataset()
+        package_two = factories.Dataset(title="Package Two")
+        showcase = factories.Dataset(type="showcase")
+
+        context = {"user": sysadmin["name"]}
+        helpers.call_action(
+            "ckanext_showcase_package_association_create",
+            context=context,
+            package_id=package_two["id"],
+            showcase_id=showcase["id"],
+        )
+
+        result = helpers.call_action(
+            "ckanext_showcase_package_association_bulk_create",
+            context=context,
+            showcase_id=showcase["id"],
+            package_ids=[
+                package_one["id"], package_two["id"], "not-a-package"
+            ],
+        )
+
+        assert result["created"] == [package_one["id"]]
+        assert set(result["errors"]) == {package_two["id"], "not-a-package"}
+        assert "Package Two" in result["errors"][package_two["id"]]
+        assert model.Session.query(ShowcasePackageAssociation).count() == 2
+
+    def test_association_bulk_create_concurrent_duplicate(self, monkeypatch):
+        """
+        Packages added to the showcase by another request after they were
+        checked are reported as errors, the others are still added.
+        """
+        sysadmin = factories.Sysadmin()
+        package_one = factories.Dataset()
+        package_two = factories.Dataset(title="Package Two")
+        showcase = factories.Dataset(type="showcase")
+        ShowcasePackageAssociation.create(
+            package_id=package_two["id"], showcase_id=showcase["id"]
+        )
+        # the other request adds package two after the check
+        monkeypatch.setattr(
+            ShowcasePackageAssociation,
+            "get_associated_package_ids",
+            classmethod(lambda cls, showcase_id, package_ids: set()),
+        )
+
+        context = {"user": sysadmin["name"]}
+        result = helpers.call_action(
+            "ckanext_showcase_package_association_bulk_create",
+            context=context,
+            showcase_id=showcase["id"],
+            package_ids=[package_one["id"], package_two["id"]],
+        )
+
+        assert result["created"] == [package_one["id"]]
+        assert list(result["errors"]) == [package_two["id"]]
+        assert "Package Two" in result["errors"][package_two["id"]]
+        assert model.Session.query(ShowcasePackageAssociation).count() == 2
+
+    def test_association_bulk_create_no_package_ids(self):
+        """
+        Calling bulk create without package ids raises ValidationError.
+        """
+        sysadmin = factories.Sysadmin()
+        showcase = factories.Dataset(type="showcase")
+
+        context = {"user": sysadmin["name"]}
+        with pytest.raises(toolkit.ValidationError):
+            helpers.call_action(
+                "ckanext_showcase_package_association_bulk_create",
+                context=context,
+                showcase_id=showcase["id"],
+            )
+
+
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_session")
 class TestCreateShowcaseAdmin(object):
     def test_showcase_admin_add_creates_showcase_admin_user(self):
@@ -328,6 +328,40 @@ class TestDeleteShowcasePackageAssociation(object):
         )
 
 
+@pytest.mark.usefixtures("with_plugins", "clean_db")
+class TestDeleteShowcasePackageAssociationBulk(object):
+    def test_association_bulk_delete(self):
+        """
+        Calling bulk delete removes the associations of the passed packages
+        only, and reports packages that aren't in the showcase.
+        """
+        sysadmin = factories.Sysadmin()
+        package_one = factories.Dataset()
+        package_two = factories.Dataset()
+        package_three = factories.Dataset()
+        showcase = factories.Dataset(type="showcase")
+
+        context = {"user": sysadmin["name"]}
+        helpers.call_action(
+            "ckanext_showcase_package_association_bulk_create",
+            context=context,
+            showcase_id=showcase["id"],
+            package_ids=[package_one["id"], package_two["id"]],
+        )
+
+        result = helpers.call_action(
+            "ckanext_showcase_package_association_bulk_delete",
+            context=context,
+            showcase_id=showcase["id"],
+            package_ids=[package_one["name"], package_three["id"]],
+        )
+
+        assert result["deleted"] == [package_one["id"]]
+        assert list(result["errors"]) == [package_three["id"]]
+        remaining = model.Session.query(ShowcasePackageAssociation).all()
+        assert [a.package_id for a in remaining] == [package_two["id"]]
+
+
 @pytest.mark.usefixtures("with_plugins", "clean_db")
 class TestRemoveShowcaseAdmin(object):
     def test_showcase_admin_remove_deletes_showcase_admin_user(self):
@@ -5,6 +5,8 @@ import pytest
 from ckan.tests import factories, helpers
 import ckan.plugins.toolkit as toolkit
 
+import ckanext.showcase.logic.action.get as showcase_get
+
 
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
 class TestShowcaseShow(object):
@@ -63,6 +65,39 @@ class TestShowcaseShow(object):
         assert "num_datasets" in showcase_shown
         assert showcase_shown["num_datasets"] == 0
 
+    def test_showcase_show_without_showcase_extras(self):
+        """
+        num_datasets and showcase_notes_formatted are left out when
+        include_showcase_extras is false.
+        """
+        my_showcase = factories.Dataset(type="showcase", name="my-showcase")
+
+        showcase_shown = helpers.call_action(
+            "ckanext_showcase_show",
+            id=my_showcase["name"],
+            include_showcase_extras="false",
+        )
+
+        assert showcase_shown["id"] == my_showcase["id"]
+        assert "num_datasets" not in showcase_shown
+        assert "showcase_notes_formatted" not in showcase_shown
+
+    @pytest.mark.ckan_config("ckanext.showcase.enrich_internal_calls", "false")
+    def test_showcase_show_internal_calls_not_enriched(self):
+        """
+        With enrich_internal_calls disabled, only outermost calls (API
+        requests and page renders) get num_datasets.
+        """
+        my_showcase = factories.Dataset(type="showcase", name="my-showcase")
+
+        internal = helpers.call_action("package_show", id=my_showcase["id"])
+        api = helpers.call_action(
+            "package_show", context={"api_version": 3}, id=my_showcase["id"]
+        )
+
+        assert "num_datasets" not in internal
+        assert api["num_datasets"] == 0
+
     def test_showcase_show_num_datasets_correct_value(self):
         """
         num_datasets property has correct value.
@@ -253,6 +288,94 @@ class TestShowcaseList(object):
             dataset_two["id"],
         ) not in showcase_list_name_id
 
+    def test_showcase_list_fields(self):
+        """
+        Showcase list action with fields returns only those fields of each
+        showcase.
+        """
+        showcase = factories.Dataset(type="showcase", title="My Showcase")
+        factories.Dataset()
+
+        showcase_list = helpers.call_action(
+            "ckanext_showcase_list", fields=["id", "title"]
+        )
+
+        assert showcase_list == [
+            {"id": showcase["id"], "title": "My Showcase"}
+        ]
+
+    def test_showcase_list_unknown_fields(self):
+        """
+        Showcase list action with fields that can't be requested raises a
+        ValidationError.
+        """
+        factories.Dataset(type="showcase")
+
+        with pytest.raises(toolkit.ValidationError):
+            helpers.call_action(
+                "ckanext_showcase_list", fields=["id", "creator_user_id"]
+            )
+
+    def test_showcase_list_limit_offset_and_count(self):
+        """
+        Showcase list action with limit, offset and include_count returns the
+        requested page of showcases sorted by title, and the total count.
+        """
+        factories.Dataset(type="showcase", title="C showcase")
+        factories.Dataset(type="showcase", title="A showcase")
+        factories.Dataset(type="showcase", title="B showcase")
+
+        result = helpers.call_action(
+            "ckanext_showcase_list",
+            fields=["title"],
+            limit=2,
+            offset=1,
+            include_count=True,
+        )
+
+        assert result == {
+            "count": 3,
+            "results": [{"title": "B showcase"}, {"title": "C showcase"}],
+        }
+
+    def test_showcase_list_sort_by_num_datasets(self):
+        """
+        Showcase list action can sort showcases by their number of datasets.
+        """
+        sysadmin = factories.Sysadmin()
+        showcase_one = factories.Dataset(type="showcase")
+        showcase_two = factories.Dataset(type="showcase")
+        showcase_three = factories.Dataset(type="showcase")
+
+        helpers.call_action(
+            "ckanext_showcase_package_association_bulk_create",
+            context={"user": sysadmin["name"]},
+            showcase_id=showcase_two["id"],
+            package_ids=[factories.Dataset()["id"], factories.Dataset()["id"]],
+        )
+        helpers.call_action(
+            "ckanext_showcase_package_association_bulk_create",
+            context={"user": sysadmin["name"]},
+            showcase_id=showcase_three["id"],
+            package_ids=[factories.Dataset()["id"]],
+        )
+
+        showcase_list = helpers.call_action(
+            "ckanext_showcase_list", fields=["id"], sort="num_datasets desc"
+        )
+
+        assert [sc["id"] for sc in showcase_list] == [
+            showcase_two["id"], showcase_three["id"], showcase_one["id"]
+        ]
+
+    def test_showcase_list_invalid_sort(self):
+        """
+        Showcase list action with an unsupported sort raises a
+        ValidationError.
+        """
+        with pytest.raises(toolkit.ValidationError):
+            helpers.call_action("ckanext_showcase_list", sort="name asc")
+
 
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
 class TestShowcasePackageList(object):
@@ -436,6 +559,214 @@ class TestShowcasePackageList(object):
                 "ckanext_showcase_package_list", showcase_id=package["id"],
             )
 
+    def test_showcase_package_list_more_packages_than_chunk_size(
+        self, monkeypatch
+    ):
+        """
+        Calling ckanext_showcase_package_list returns every package, even when
+        there are more of them than are searched for at a time.
+        """
+        monkeypatch.setattr(showcase_get, "PACKAGE_LIST_CHUNK_SIZE", 2)
+        sysadmin = factories.User(sysadmin=True)
+
+        packages = [factories.Dataset() for i in range(0, 5)]
+        showcase_id = factories.Dataset(type="showcase")["id"]
+        context = {"user": sysadmin["name"]}
+        for package in packages:
+            helpers.call_action(
+                "ckanext_showcase_package_association_create",
+                context=context,
+                package_id=package["id"],
+                showcase_id=showcase_id,
+            )
+
+        pkg_list = helpers.call_action(
+            "ckanext_showcase_package_list", showcase_id=showcase_id
+        )
+
+        assert sorted(pkg["id"] for pkg in pkg_list) == sorted(
+            package["id"] for package in packages
+        )
+
+    def test_showcase_package_list_dataset_updated_between_chunks(
+        self, monkeypatch
+    ):
+        """
+        Datasets updated while the packages are fetched chunk by chunk are
+        neither returned twice nor skipped.
+        """
+        monkeypatch.setattr(showcase_get, "PACKAGE_LIST_CHUNK_SIZE", 2)
+        sysadmin = factories.User(sysadmin=True)
+
+        packages = [factories.Dataset() for i in range(0, 5)]
+        showcase_id = factories.Dataset(type="showcase")["id"]
+        context = {"user": sysadmin["name"]}
+        for package in packages:
+            helpers.call_action(
+                "ckanext_showcase_package_association_create",
+                context=context,
+                package_id=package["id"],
+                showcase_id=showcase_id,
+            )
+
+        results = showcase_get._iter_showcase_packages(
+            {"user": sysadmin["name"]}, showcase_id
+        )
+        # the first chunk has been fetched, update a dataset of another one
+        seen = [next(results)["id"], next(results)["id"]]
+        helpers.call_action(
+            "package_patch",
+            id=[pkg["id"] for pkg in packages if pkg["id"] not in seen][0],
+            title="Updated",
+        )
+        seen.extend(pkg["id"] for pkg in results)
+
+        assert sorted(seen) == sorted(package["id"] for package in packages)
+
+    def test_showcase_package_list_limit_and_offset(self):
+        """
+        Calling ckanext_showcase_package_list with limit and offset returns
+        the requested page of packages.
+        """
+        sysadmin = factories.User(sysadmin=True)
+
+        packages = [factories.Dataset() for i in range(0, 3)]
+        showcase_id = factories.Dataset(type="showcase")["id"]
+        context = {"user": sysadmin["name"]}
+        for package in packages:
+            helpers.call_action(
+                "ckanext_showcase_package_association_create",
+                context=context,
+                package_id=package["id"],
+                showcase_id=showcase_id,
+            )
+
+        first_page = helpers.call_action(
+            "ckanext_showcase_package_list",
+            showcase_id=showcase_id,
+            limit=2,
+        )
+        second_page = helpers.call_action(
+            "ckanext_showcase_package_list",
+            showcase_id=showcase_id,
+            limit=2,
+            offset=2,
+        )
+
+        assert len(first_page) == 2
+        assert len(second_page) == 1
+        assert sorted(pkg["id"] for pkg in first_page + second_page) == sorted(
+            package["id"] for package in packages
+        )
+
+    def test_showcase_package_list_fl(self):
+        """
+        Calling ckanext_showcase_package_list with fl only returns those
+        fields of the packages.
+        """
+        sysadmin = factories.User(sysadmin=True)
+        package = factories.Dataset(title="My Dataset")
+        showcase_id = factories.Dataset(type="showcase")["id"]
+        helpers.call_action(
+            "ckanext_showcase_package_association_create",
+            context={"user": sysadmin["name"]},
+            package_id=package["id"],
+            showcase_id=showcase_id,
+        )
+
+        pkg_list = helpers.call_action(
+            "ckanext_showcase_package_list",
+            showcase_id=showcase_id,
+            fl=["id", "name", "title"],
+        )
+
+        assert pkg_list == [
+            {
+                "id": package["id"],
+                "name": package["name"],
+                "title": "My Dataset",
+            }
+        ]
+
+    def test_showcase_package_list_unknown_fl(self):
+        """
+        Calling ckanext_showcase_package_list with an unknown fl field raises
+        a ValidationError.
+        """
+        showcase_id = factories.Dataset(type="showcase")["id"]
+
+        with pytest.raises(toolkit.ValidationError):
+            helpers.call_action(
+                "ckanext_showcase_package_list",
+                showcase_id=showcase_id,
+                fl=["id", "resources"],
+            )
+
+    @pytest.mark.usefixtures("with_request_context")
+    def test_showcase_package_list_is_memoized_per_request(self, monkeypatch):
+        """
+        Calling ckanext_showcase_package_list twice while handling a request
+        only searches once, until the showcase datasets change.
+        """
+        sysadmin = factories.User(sysadmin=True)
+        package_ids = [factories.Dataset()["id"] for i in range(0, 2)]
+        showcase_id = factories.Dataset(type="showcase")["id"]
+        context = {"user": sysadmin["name"]}
+        helpers.call_action(
+            "ckanext_showcase_package_association_create",
+            context=context,
+            package_id=package_ids[0],
+            showcase_id=showcase_id,
+        )
+
+        searches = []
+        iter_showcase_packages = showcase_get._iter_showcase_packages
+
+        def counting_iter(*args, **kwargs):
+            searches.append(args)
+            return iter_showcase_packages(*args, **kwargs)
+
+        monkeypatch.setattr(
+            showcase_get, "_iter_showcase_packages", counting_iter
+        )
+
+        first = helpers.call_action(
+            "ckanext_showcase_package_list", showcase_id=showcase_id
+        )
+        second = helpers.call_action(
+            "ckanext_showcase_package_list", showcase_id=showcase_id
+        )
+
+        assert first == second
+        assert len(searches) == 1
+
+        helpers.call_action(
+            "ckanext_showcase_package_association_create",
+            context=context,
+            package_id=package_ids[1],
+            showcase_id=showcase_id,
+        )
+        third = helpers.call_action(
+            "ckanext_showcase_package_list", showcase_id=showcase_id
+        )
+
+        assert len(third) == 2
+        assert len(searches) == 2
+
+    def test_showcase_package_list_negative_limit(self):
+        """
+        Calling ckanext_showcase_package_list with a negative limit raises a
+        ValidationError.
+        """
+        showcase_id = factories.Dataset(type="showcase")["id"]
+
+        with pytest.raises(toolkit.ValidationError):
+            helpers.call_action(
+                "ckanext_showcase_package_list",
+                showcase_id=showcase_id,
+                limit=-1,
+            )
+
 
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
 class TestPackageShowcaseList(object):
@@ -618,6 +618,56 @@ class TestShowcasePackageAssociationCreate(object):
             "ckanext_showcase_package_association_create", context=context
         )
 
+    def test_showcase_package_association_create_removed_showcase_admin(
+        self,
+    ):
+        """
+        Calling showcase package association create by a user who is no
+        longer a showcase admin raises NotAuthorized, even though the admin
+        list was cached while they were one.
+        """
+        showcase_admin = factories.User()
+        helpers.call_action(
+            "ckanext_showcase_admin_add",
+            context={},
+            username=showcase_admin["name"],
+        )
+        context = {"user": showcase_admin["name"], "model": None}
+        helpers.call_auth(
+            "ckanext_showcase_package_association_create", context=context
+        )
+
+        helpers.call_action(
+            "ckanext_showcase_admin_remove",
+            context={},
+            username=showcase_admin["name"],
+        )
+
+        context = {"user": showcase_admin["name"], "model": None}
+        with pytest.raises(toolkit.NotAuthorized):
+            helpers.call_auth(
+                "ckanext_showcase_package_association_create", context=context,
+            )
+
+    @pytest.mark.ckan_config("ckanext.showcase.admin_cache_ttl", "0")
+    def test_showcase_package_association_create_showcase_admin_no_cache(
+        self,
+    ):
+        """
+        Showcase admins are recognised when the admin cache is disabled.
+        """
+        showcase_admin = factories.User()
+        helpers.call_action(
+            "ckanext_showcase_admin_add",
+            context={},
+            username=showcase_admin["name"],
+        )
+
+        context = {"user": showcase_admin["name"], "model": None}
+        helpers.call_auth(
+            "ckanext_showcase_package_association_create", context=context
+        )
+
     def test_showcase_package_association_create_unauthorized_creds(self):
         """
         Calling showcase package association create with unauthorized user
@@ -688,6 +738,128 @@ class TestShowcasePackageAssociationDelete(object):
             )
 
 
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestShowcasePackageAssociationBulkCreate(object):
+    def test_showcase_package_association_bulk_create_no_user(self):
+        """
+        Calling showcase package association bulk create with no user raises
+        NotAuthorized.
+        """
+
+        context = {"user": None, "model": None}
+        with pytest.raises(toolkit.NotAuthorized):
+            helpers.call_auth(
+                "ckanext_showcase_package_association_bulk_create",
+                context=context,
+            )
+
+    def test_showcase_package_association_bulk_create_sysadmin(self):
+        """
+        Calling showcase package association bulk create by a sysadmin
+        doesn't raise NotAuthorized.
+        """
+        a_sysadmin = factories.Sysadmin()
+        context = {"user": a_sysadmin["name"], "model": None}
+        helpers.call_auth(
+            "ckanext_showcase_package_association_bulk_create", context=context
+        )
+
+    def test_showcase_package_association_bulk_create_showcase_admin(self):
+        """
+        Calling showcase package association bulk create by a showcase admin
+        doesn't raise NotAuthorized.
+        """
+        showcase_admin = factories.User()
+
+        # Make user a showcase admin
+        helpers.call_action(
+            "ckanext_showcase_admin_add",
+            context={},
+            username=showcase_admin["name"],
+        )
+
+        context = {"user": showcase_admin["name"], "model": None}
+        helpers.call_auth(
+            "ckanext_showcase_package_association_bulk_create", context=context
+        )
+
+    def test_showcase_package_association_bulk_create_unauthorized_creds(
+        self,
+    ):
+        """
+        Calling showcase package association bulk create with unauthorized
+        user raises NotAuthorized.
+        """
+        not_a_sysadmin = factories.User()
+        context = {"user": not_a_sysadmin["name"], "model": None}
+        with pytest.raises(toolkit.NotAuthorized):
+            helpers.call_auth(
+                "ckanext_showcase_package_association_bulk_create",
+                context=context,
+            )
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestShowcasePackageAssociationBulkDelete(object):
+    def test_showcase_package_association_bulk_delete_no_user(self):
+        """
+        Calling showcase package association bulk delete with no user raises
+        NotAuthorized.
+        """
+
+        context = {"user": None, "model": None}
+        with pytest.raises(toolkit.NotAuthorized):
+            helpers.call_auth(
+                "ckanext_showcase_package_association_bulk_delete",
+                context=context,
+            )
+
+    def test_showcase_package_association_bulk_delete_sysadmin(self):
+        """
+        Calling showcase package association bulk delete by a sysadmin
+        doesn't raise NotAuthorized.
+        """
+        a_sysadmin = factories.Sysadmin()
+        context = {"user": a_sysadmin["name"], "model": None}
+        helpers.call_auth(
+            "ckanext_showcase_package_association_bulk_delete", context=context
+        )
+
+    def test_showcase_package_association_bulk_delete_showcase_admin(self):
+        """
+        Calling showcase package association bulk delete by a showcase admin
+        doesn't raise NotAuthorized.
+        """
+        showcase_admin = factories.User()
+
+        # Make user a showcase admin
+        helpers.call_action(
+            "ckanext_showcase_admin_add",
+            context={},
+            username=showcase_admin["name"],
+        )
+
+        context = {"user": showcase_admin["name"], "model": None}
+        helpers.call_auth(
+            "ckanext_showcase_package_association_bulk_delete", context=context
+        )
+
+    def test_showcase_package_association_bulk_delete_unauthorized_creds(
+        self,
+    ):
+        """
+        Calling showcase package association bulk delete with unauthorized
+        user raises NotAuthorized.
+        """
+        not_a_sysadmin = factories.User()
+        context = {"user": not_a_sysadmin["name"], "model": None}
+        with pytest.raises(toolkit.NotAuthorized):
+            helpers.call_auth(
+                "ckanext_showcase_package_association_bulk_delete",
+                context=context,
+            )
+
+
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
 class TestShowcaseAdminAddAuth(object):
     def test_showcase_admin_add_no_user(self):
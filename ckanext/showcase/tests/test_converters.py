@@ -7,6 +7,7 @@ import ckan.plugins.toolkit as toolkit
 
 from ckan.tests import factories
 
+from ckanext.showcase.logic.cache import get_request_cache
 from ckanext.showcase.logic.converters import (
     convert_package_name_or_id_to_title_or_name,
 )
@@ -75,3 +76,22 @@ class TestNameOrIdToTitleConverter(object):
             convert_package_name_or_id_to_title_or_name(
                 "my-non-existent-id", context=context,
             )
+
+    @pytest.mark.usefixtures("with_request_context")
+    def test_lookups_are_remembered_for_the_request(self):
+        """
+        Package found while handling a request is remembered by both its name
+        and its id.
+        """
+        my_id = str(uuid.uuid4())
+        context = {"session": model.Session}
+        factories.Dataset(id=my_id, title="My Title", name="my-name")
+
+        result = convert_package_name_or_id_to_title_or_name(
+            "my-name", context
+        )
+
+        assert "My Title" == result
+        cache = get_request_cache("package_name_or_id")
+        assert cache["my-name"] == (my_id, "dataset", "My Title", "my-name")
+        assert cache[my_id] == cache["my-name"]
@@ -1,5 +1,6 @@
 import pytest
 
+from ckan.lib import helpers as h
 from ckan.plugins import toolkit as tk
 
 from ckan.tests import factories
@@ -70,3 +71,71 @@ class TestGetSiteStatistics(object):
         stats = showcase_helpers.get_site_statistics()
         assert stats["dataset_count"] == 10
         assert stats["showcase_count"] == 5
+
+    @pytest.mark.ckan_config("ckanext.showcase.stats_cache_ttl", "300")
+    def test_site_statistics_are_cached(self):
+        """
+        Site statistics are cached when a cache ttl is configured.
+        """
+        showcase_helpers.clear_site_statistics_cache()
+        factories.Dataset()
+        factories.Group()
+        factories.Organization()
+
+        stats = showcase_helpers.get_site_statistics()
+        assert stats["dataset_count"] == 1
+        assert stats["group_count"] == 1
+        assert stats["organization_count"] == 1
+
+        factories.Dataset()
+
+        assert showcase_helpers.get_site_statistics() == stats
+
+        showcase_helpers.clear_site_statistics_cache()
+        assert showcase_helpers.get_site_statistics()["dataset_count"] == 2
+
+
+class TestRenderedNotesCache(object):
+    def test_render_is_cached(self):
+        """
+        Rendering the same notes twice only calls the renderer once.
+        """
+        rendered = []
+
+        def render(notes):
+            rendered.append(notes)
+            return notes.upper()
+
+        cache = showcase_helpers.RenderedNotesCache(maxsize=10)
+
+        assert cache.get("some notes", render) == "SOME NOTES"
+        assert cache.get("some notes", render) == "SOME NOTES"
+        assert rendered == ["some notes"]
+        assert cache.info() == {
+            "hits": 1, "misses": 1, "size": 1, "maxsize": 10
+        }
+
+    def test_least_recently_used_is_evicted(self):
+        """
+        The cache never holds more than maxsize rendered notes, and evicts
+        the least recently used ones first.
+        """
+        cache = showcase_helpers.RenderedNotesCache(maxsize=2)
+
+        cache.get("one", str.upper)
+        cache.get("two", str.upper)
+        cache.get("one", str.upper)
+        cache.get("three", str.upper)
+
+        assert cache.info()["size"] == 2
+        cache.get("one", str.upper)
+        assert cache.info()["hits"] == 2
+        cache.get("two", str.upper)
+        assert cache.info()["misses"] == 4
+
+
+@pytest.mark.usefixtures("with_request_context")
+def test_render_showcase_notes():
+    notes = "# Title\n\nSome *markdown*"
+    assert showcase_helpers.render_showcase_notes(notes) == \
+        h.render_markdown(notes)
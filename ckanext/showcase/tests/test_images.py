@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from ckan.tests import factories, helpers
+
+import ckanext.showcase.images as showcase_images
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def showcase_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        showcase_images.uploader, "get_storage_path", lambda: str(tmp_path)
+    )
+    path = tmp_path / "storage" / "uploads" / "showcase"
+    path.mkdir(parents=True)
+    return path
+
+
+@pytest.mark.usefixtures("with_plugins", "with_request_context")
+class TestImageVariants(object):
+    def test_create_image_variants(self, showcase_storage):
+        """
+        The job creates a WebP variant of the image for each size, fitting in
+        that size.
+        """
+        Image.new("RGB", (1600, 800)).save(
+            str(showcase_storage / "screenshot.png")
+        )
+
+        showcase_images.create_image_variants("screenshot.png")
+
+        for variant, (width, height) in showcase_images.IMAGE_VARIANTS.items():
+            variant_path = showcase_storage / "variants" / (
+                "screenshot.png.{0}.webp".format(variant)
+            )
+            with Image.open(str(variant_path)) as image:
+                assert image.format == "WEBP"
+                assert image.size[0] <= width
+                assert image.size[1] <= height
+
+        url = showcase_images.image_variant_url("screenshot.png", "thumbnail")
+        assert url.endswith(
+            "/uploads/showcase/variants/screenshot.png.thumbnail.webp"
+        )
+
+    @pytest.mark.usefixtures("clean_db")
+    def test_showcase_dict_has_variant_urls(self, showcase_storage):
+        """
+        Showcases with an uploaded image get the urls of its variants, the
+        card one being used by the showcase page.
+        """
+        Image.new("RGB", (1600, 800)).save(
+            str(showcase_storage / "screenshot.png")
+        )
+        showcase_images.create_image_variants("screenshot.png")
+        showcase = factories.Dataset(
+            type="showcase", image_url="screenshot.png"
+        )
+
+        pkg_dict = helpers.call_action("package_show", id=showcase["id"])
+
+        assert pkg_dict["image_thumbnail_url"].endswith(
+            "/variants/screenshot.png.thumbnail.webp"
+        )
+        assert pkg_dict["image_card_url"].endswith(
+            "/variants/screenshot.png.card.webp"
+        )
+
+    def test_no_variant_url_before_the_job_ran(self, showcase_storage):
+        """
+        There is no url for variants that haven't been created.
+        """
+        Image.new("RGB", (100, 100)).save(str(showcase_storage / "new.png"))
+
+        assert (
+            showcase_images.image_variant_url("new.png", "thumbnail") is None
+        )
+
+    def test_remove_image_variants(self, showcase_storage):
+        """
+        Removing the variants of an image deletes their files.
+        """
+        Image.new("RGB", (100, 100)).save(str(showcase_storage / "old.png"))
+        showcase_images.create_image_variants("old.png")
+
+        showcase_images.remove_image_variants("old.png")
+
+        assert os.listdir(str(showcase_storage / "variants")) == []
@@ -0,0 +1,167 @@
+import pytest
+
+import ckan.model as model
+import ckan.plugins.toolkit as tk
+from ckan.tests import factories, helpers
+
+import ckanext.showcase.jobs as showcase_jobs
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    calls = []
+
+    def enqueue_job(fn, args=None, **kwargs):
+        calls.append((fn, args))
+
+    monkeypatch.setattr(tk, "enqueue_job", enqueue_job)
+    return calls
+
+
+def _showcase_with_dataset():
+    sysadmin = factories.Sysadmin()
+    showcase = factories.Dataset(type="showcase")
+    dataset = factories.Dataset()
+    helpers.call_action(
+        "ckanext_showcase_package_association_create",
+        context={"user": sysadmin["name"]},
+        package_id=dataset["id"],
+        showcase_id=showcase["id"],
+    )
+    return showcase, dataset
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index", "clean_redis")
+class TestReindexOnDatasetChange(object):
+    def test_dataset_changes_are_coalesced(self, enqueued):
+        """
+        Several updates of a dataset queue a single reindex of its showcase.
+        """
+        showcase, dataset = _showcase_with_dataset()
+
+        for i in range(0, 3):
+            helpers.call_action(
+                "package_patch", id=dataset["id"], title="Title {0}".format(i)
+            )
+
+        assert enqueued == [
+            (showcase_jobs.reindex_showcase, [showcase["id"]])
+        ]
+
+    def test_reindex_queued_after_commit(self, enqueued):
+        """
+        The reindex is only queued once the change is committed, so the job
+        reads it.
+        """
+        showcase, dataset = _showcase_with_dataset()
+
+        helpers.call_action(
+            "package_patch",
+            context={"defer_commit": True},
+            id=dataset["id"],
+            title="New",
+        )
+        assert enqueued == []
+
+        model.Session.commit()
+        assert enqueued == [
+            (showcase_jobs.reindex_showcase, [showcase["id"]])
+        ]
+
+    def test_job_clears_pending_reindex(self, enqueued):
+        """
+        Changes made after the job started queue another reindex.
+        """
+        showcase, dataset = _showcase_with_dataset()
+        helpers.call_action("package_patch", id=dataset["id"], title="One")
+
+        showcase_jobs.reindex_showcase(showcase["id"])
+        helpers.call_action("package_delete", id=dataset["id"])
+
+        assert len(enqueued) == 2
+
+    def test_changes_during_the_job_queue_another(
+        self, enqueued, monkeypatch
+    ):
+        """
+        Changes committed while the job runs queue a single follow-up job.
+        """
+        showcase, dataset = _showcase_with_dataset()
+        helpers.call_action("package_patch", id=dataset["id"], title="One")
+        reindex_packages = showcase_jobs.utils.reindex_packages
+
+        def reindex_while_changing(package_ids):
+            for title in ("Two", "Three"):
+                helpers.call_action(
+                    "package_patch", id=dataset["id"], title=title
+                )
+            reindex_packages(package_ids)
+
+        monkeypatch.setattr(
+            showcase_jobs.utils, "reindex_packages", reindex_while_changing
+        )
+        showcase_jobs.reindex_showcase(showcase["id"])
+
+        assert enqueued == [
+            (showcase_jobs.reindex_showcase, [showcase["id"]])
+        ] * 2
+
+    def test_failed_enqueue_does_not_block_reindexes(
+        self, enqueued, monkeypatch
+    ):
+        """
+        A reindex that could not be queued doesn't prevent the next ones.
+        """
+        showcase, dataset = _showcase_with_dataset()
+        enqueue_job = tk.enqueue_job
+
+        def failing_enqueue_job(fn, args=None, **kwargs):
+            raise RuntimeError("queue unavailable")
+
+        monkeypatch.setattr(tk, "enqueue_job", failing_enqueue_job)
+        helpers.call_action("package_patch", id=dataset["id"], title="One")
+
+        monkeypatch.setattr(tk, "enqueue_job", enqueue_job)
+        helpers.call_action("package_patch", id=dataset["id"], title="Two")
+
+        assert enqueued == [
+            (showcase_jobs.reindex_showcase, [showcase["id"]])
+        ]
+
+    def test_job_reindexes_showcase(self, enqueued):
+        """
+        The showcase document is reindexed with its current datasets.
+        """
+        showcase, dataset = _showcase_with_dataset()
+        helpers.call_action("package_delete", id=dataset["id"])
+
+        showcase_jobs.reindex_showcase(showcase["id"])
+
+        result = helpers.call_action(
+            "package_search",
+            fq="dataset_type:showcase",
+            **{"facet.field": ["showcase_num_datasets"]}
+        )
+        assert [
+            item["display_name"]
+            for item in result["search_facets"]["showcase_num_datasets"][
+                "items"
+            ]
+        ] == ["0"]
+
+    def test_datasets_not_in_a_showcase_queue_nothing(self, enqueued):
+        dataset = factories.Dataset()
+
+        helpers.call_action("package_patch", id=dataset["id"], title="New")
+
+        assert enqueued == []
+
+    @pytest.mark.ckan_config(
+        "ckanext.showcase.reindex_on_dataset_change", "false"
+    )
+    def test_disabled(self, enqueued):
+        showcase, dataset = _showcase_with_dataset()
+
+        helpers.call_action("package_patch", id=dataset["id"], title="New")
+
+        assert enqueued == []
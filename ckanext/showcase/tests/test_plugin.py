@@ -1,6 +1,9 @@
+import io
+
 import pytest
 from bs4 import BeautifulSoup
 
+from ckan.lib import helpers as h
 from ckan.lib.helpers import url_for
 
 
@@ -10,6 +13,7 @@ import ckan.model as model
 from ckan.tests import factories, helpers
 
 from ckanext.showcase.model import ShowcasePackageAssociation
+import ckanext.showcase.logic.helpers as showcase_helpers
 
 import logging
 
@@ -29,6 +33,29 @@ class TestShowcaseIndex(object):
         assert "1 showcase found" in response.body
         assert "my-showcase" in response.body
 
+    def test_showcase_dataset_count_on_index(self, app):
+        """
+        Showcases on the index page display their number of datasets.
+        """
+        sysadmin = factories.Sysadmin()
+        showcase_one = factories.Dataset(type="showcase", name="my-showcase")
+        factories.Dataset(type="showcase", name="my-other-showcase")
+        dataset_one = factories.Dataset()
+        dataset_two = factories.Dataset()
+
+        context = {"user": sysadmin["name"]}
+        for dataset in (dataset_one, dataset_two):
+            helpers.call_action(
+                "ckanext_showcase_package_association_create",
+                context=context,
+                package_id=dataset["id"],
+                showcase_id=showcase_one["id"],
+            )
+
+        response = app.get("/showcase", status=200)
+        assert "2 Datasets" in response.body
+        assert "0 Datasets" in response.body
+
 
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
 class TestShowcaseNewView(object):
@@ -406,6 +433,185 @@ class TestSearch(object):
         result = helpers.call_action("package_search", fq="tags:" + tag)
         assert result["count"] == 1
 
+    def test_search_results_include_showcase_dataset_count(self):
+        """
+        Showcases returned by package_search include an up to date
+        num_datasets.
+        """
+        sysadmin = factories.Sysadmin()
+        showcase = factories.Dataset(type="showcase", name="my-showcase")
+        dataset = factories.Dataset()
+        private_dataset = factories.Dataset(
+            private=True, owner_org=factories.Organization()["id"]
+        )
+
+        context = {"user": sysadmin["name"]}
+        for pkg in (dataset, private_dataset):
+            helpers.call_action(
+                "ckanext_showcase_package_association_create",
+                context=context,
+                package_id=pkg["id"],
+                showcase_id=showcase["id"],
+            )
+
+        result = helpers.call_action(
+            "package_search", fq="dataset_type:showcase"
+        )
+        assert result["count"] == 1
+        assert result["results"][0]["num_datasets"] == 1
+
+    def test_dataset_indexed_with_showcase_ids(self):
+        """
+        Datasets are indexed with the ids of their showcases, and reindexed
+        when associations are created or deleted.
+        """
+        sysadmin = factories.Sysadmin()
+        showcase = factories.Dataset(type="showcase", name="my-showcase")
+        dataset = factories.Dataset()
+        factories.Dataset()
+
+        fq = "vocab_showcase_ids:{0}".format(showcase["id"])
+        context = {"user": sysadmin["name"]}
+        helpers.call_action(
+            "ckanext_showcase_package_association_create",
+            context=context,
+            package_id=dataset["id"],
+            showcase_id=showcase["id"],
+        )
+
+        result = helpers.call_action("package_search", fq=fq)
+        assert result["count"] == 1
+        assert result["results"][0]["id"] == dataset["id"]
+
+        helpers.call_action(
+            "ckanext_showcase_package_association_delete",
+            context=context,
+            package_id=dataset["id"],
+            showcase_id=showcase["id"],
+        )
+
+        result = helpers.call_action("package_search", fq=fq)
+        assert result["count"] == 0
+
+    @pytest.mark.usefixtures("with_request_context")
+    def test_showcase_view_fields_in_search_results(self):
+        """
+        Showcases searched for a page come with their read url, image source
+        and notes extract, so showcase_item.html doesn't build them.
+        """
+        factories.Dataset(
+            type="showcase", name="my-showcase", notes="# Title\n\nSome notes"
+        )
+
+        result = helpers.call_action(
+            "package_search",
+            context={"for_view": True},
+            fq="dataset_type:showcase",
+        )
+
+        pkg_dict = result["results"][0]
+        assert pkg_dict["showcase_read_url"] == url_for(
+            "showcase_blueprint.read", id="my-showcase"
+        )
+        assert pkg_dict["showcase_image_src"].endswith(
+            "/base/images/placeholder-group.png"
+        )
+        assert pkg_dict["showcase_notes_extract"] == h.markdown_extract(
+            "# Title\n\nSome notes",
+            extract_length=showcase_helpers.NOTES_EXTRACT_LENGTH,
+        )
+
+    def test_showcase_indexed_with_its_datasets_facets(self):
+        """
+        Showcases are indexed with the number, organizations and resource
+        formats of their datasets, to facet and sort on.
+        """
+        sysadmin = factories.Sysadmin()
+        org = factories.Organization(name="my-org")
+        showcase = factories.Dataset(type="showcase", name="my-showcase")
+        factories.Dataset(type="showcase", name="empty-showcase")
+        datasets = [
+            factories.Dataset(
+                owner_org=org["id"],
+                resources=[{"url": "http://example.com/a", "format": "CSV"}],
+            ),
+            factories.Dataset(
+                resources=[{"url": "http://example.com/b", "format": "JSON"}],
+            ),
+        ]
+
+        context = {"user": sysadmin["name"]}
+        helpers.call_action(
+            "ckanext_showcase_package_association_bulk_create",
+            context=context,
+            package_ids=[dataset["id"] for dataset in datasets],
+            showcase_id=showcase["id"],
+        )
+
+        result = helpers.call_action(
+            "package_search",
+            fq="dataset_type:showcase",
+            sort="showcase_num_datasets desc",
+            **{
+                "facet.field": [
+                    "vocab_showcase_organizations",
+                    "vocab_showcase_res_formats",
+                    "showcase_num_datasets",
+                ]
+            }
+        )
+
+        assert [pkg["name"] for pkg in result["results"]] == [
+            "my-showcase",
+            "empty-showcase",
+        ]
+        facets = result["search_facets"]
+        assert [
+            item["name"]
+            for item in facets["vocab_showcase_organizations"]["items"]
+        ] == ["my-org"]
+        assert sorted(
+            item["name"]
+            for item in facets["vocab_showcase_res_formats"]["items"]
+        ) == ["CSV", "JSON"]
+        assert sorted(
+            item["display_name"]
+            for item in facets["showcase_num_datasets"]["items"]
+        ) == ["0", "2"]
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestManageDatasetsView(object):
+    def test_search_excludes_datasets_in_the_showcase(self, app):
+        """
+        The datasets already in the showcase are listed once, in the showcase
+        table, and not among the datasets to add.
+        """
+        sysadmin = factories.Sysadmin()
+        showcase = factories.Dataset(type="showcase", name="my-showcase")
+        in_showcase = factories.Dataset()
+        not_in_showcase = factories.Dataset()
+        helpers.call_action(
+            "ckanext_showcase_package_association_create",
+            context={"user": sysadmin["name"]},
+            package_id=in_showcase["id"],
+            showcase_id=showcase["id"],
+        )
+
+        env = {"REMOTE_USER": sysadmin["name"].encode("ascii")}
+        response = app.get(
+            url=url_for("showcase_blueprint.manage_datasets", id="my-showcase"),
+            extra_environ=env,
+        )
+
+        soup = BeautifulSoup(response.body, "html.parser")
+        checkboxes = [
+            checkbox["name"]
+            for checkbox in soup.find_all("input", type="checkbox")
+        ]
+        assert checkboxes.count("dataset_" + in_showcase["id"]) == 1
+        assert checkboxes.count("dataset_" + not_in_showcase["id"]) == 1
+
 
 @pytest.mark.usefixtures("with_plugins", "clean_db")
 class TestCKEditor(object):
@@ -442,3 +648,21 @@ class TestCKEditor(object):
             url=url_for("showcase_blueprint.read", id="my-showcase",), extra_environ=env,
         )
         assert '<div class="ck-content">' in response.body
+
+    @pytest.mark.ckan_config("ckan.max_image_size", "1")
+    def test_oversize_upload_is_rejected_early(self, app):
+        """
+        Upload too large for ckan.max_image_size is refused with a 413 before
+        its body is read.
+        """
+        sysadmin = factories.Sysadmin()
+
+        env = {"REMOTE_USER": sysadmin["name"].encode("ascii")}
+        response = app.post(
+            url=url_for("showcase_blueprint.upload"),
+            data={"upload": (io.BytesIO(b"x" * (2 * 2 ** 20)), "big.png")},
+            extra_environ=env,
+            status=413,
+        )
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.json["error"]["message"]
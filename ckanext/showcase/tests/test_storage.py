@@ -0,0 +1,147 @@
+import hashlib
+import io
+import os
+
+import pytest
+from flask import Response
+from werkzeug.datastructures import FileStorage
+
+import ckan.plugins.toolkit as tk
+
+import ckanext.showcase.storage as showcase_storage
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+HTML = b"<!DOCTYPE html><html><body><script>alert(1)</script></body></html>"
+
+
+@pytest.fixture
+def storage_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        showcase_storage.uploader, "get_storage_path", lambda: str(tmp_path)
+    )
+    return tmp_path / "storage" / "uploads" / "showcase"
+
+
+def _upload(
+    content,
+    filename="screenshot.png",
+    old_filename=None,
+    content_type="image/png",
+):
+    upload = showcase_storage.get_uploader("showcase", old_filename)
+    data_dict = {
+        "image_upload": FileStorage(
+            io.BytesIO(content), filename=filename, content_type=content_type
+        )
+    }
+    upload.update_data_dict(
+        data_dict, "image_url", "image_upload", "clear_upload"
+    )
+    upload.upload(2)
+    return data_dict["image_url"]
+
+
+@pytest.mark.ckan_config("ckanext.showcase.content_addressed_storage", "true")
+@pytest.mark.ckan_config("ckan.upload.showcase.mimetypes", "image/png")
+@pytest.mark.ckan_config("ckan.upload.showcase.types", "image")
+@pytest.mark.usefixtures("with_plugins")
+class TestContentAddressedUpload(object):
+    def test_file_stored_under_its_digest(self, storage_path):
+        """
+        Uploaded file is named after the digest of its contents.
+        """
+        filename = _upload(PNG)
+
+        assert filename == hashlib.sha256(PNG).hexdigest() + ".png"
+        with open(str(storage_path / filename), "rb") as f:
+            assert f.read() == PNG
+
+    def test_duplicate_upload_reuses_file(self, storage_path):
+        """
+        Uploading the same contents again returns the same file name and
+        stores a single file.
+        """
+        first = _upload(PNG, filename="one.png")
+        second = _upload(PNG, filename="two.png")
+
+        assert first == second
+        assert os.listdir(str(storage_path)) == [first]
+
+    def test_replaced_file_is_kept(self, storage_path):
+        """
+        Files are not deleted when replaced, as other showcases may use them.
+        """
+        first = _upload(PNG)
+        second = _upload(PNG + b"\x01", old_filename=first)
+
+        assert sorted(os.listdir(str(storage_path))) == sorted(
+            [first, second]
+        )
+
+    def test_extension_follows_contents(self, storage_path):
+        """
+        The extension of the stored file comes from the type of its contents,
+        not from the name given by the client.
+        """
+        filename = _upload(PNG, filename="screenshot.html")
+
+        assert filename == hashlib.sha256(PNG).hexdigest() + ".png"
+
+    def test_disallowed_type(self, storage_path):
+        """
+        Upload of a type not allowed for showcases raises a ValidationError
+        and leaves nothing behind.
+        """
+        with pytest.raises(tk.ValidationError):
+            _upload(HTML, filename="page.html", content_type="text/html")
+
+        assert not storage_path.exists() or os.listdir(str(storage_path)) == []
+
+    def test_too_large_upload(self, storage_path):
+        """
+        Upload larger than the maximum size raises a ValidationError and
+        leaves nothing behind.
+        """
+        with pytest.raises(tk.ValidationError):
+            _upload(PNG + b"\x00" * (3 * 2 ** 20))
+
+        assert os.listdir(str(storage_path)) == []
+
+    def test_immutable_cache_headers(self, app):
+        """
+        Content-addressed uploads are served with long-lived cache headers,
+        other paths are not.
+        """
+        digest = hashlib.sha256(PNG).hexdigest()
+        for path, cached in [
+            ("/uploads/showcase/{0}.png".format(digest), True),
+            ("/uploads/showcase_image/{0}.png".format(digest), True),
+            ("/uploads/showcase/variants/{0}.png.thumbnail.webp".format(digest),
+             True),
+            ("/uploads/showcase/2024-01-01screenshot.png", False),
+            ("/showcase", False),
+        ]:
+            with app.flask_app.test_request_context(path):
+                response = showcase_storage.add_cache_headers(Response())
+            assert (
+                response.headers.get("Cache-Control")
+                == showcase_storage.CACHE_CONTROL
+            ) is cached
+
+
+@pytest.mark.ckan_config("ckanext.showcase.content_addressed_storage", "true")
+@pytest.mark.usefixtures("with_plugins")
+def test_only_images_without_configured_types(storage_path):
+    """
+    Without configured upload types, only common image types are accepted.
+    """
+    with pytest.raises(tk.ValidationError):
+        _upload(HTML, filename="page.svg", content_type="image/svg+xml")
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_default_uploader_when_disabled():
+    """
+    Without the option, showcase uploads use CKAN's default uploader.
+    """
+    assert showcase_storage.get_uploader("showcase") is None
@@ -1,11 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import io
+import json
+
 import pytest
 
 from ckan.lib import helpers
+from ckan.lib import search
 from ckan.tests import factories, helpers as test_helpers
 
-from ckanext.showcase.utils import markdown_to_html
+from ckanext.showcase.model import ShowcaseAdmin, ShowcasePackageAssociation
+from ckanext.showcase.utils import (
+    export_showcases,
+    import_showcases,
+    markdown_to_html,
+    reindex,
+)
 
 
 @pytest.mark.usefixtures("with_plugins", "clean_db")
@@ -39,3 +49,183 @@ class TestUtils(object):
             )
 
         assert migrated_showcase2['notes'] == helpers.render_markdown(showcase2['notes'])
+
+    def test_markdown_to_html_in_batches_resuming(self):
+        showcases = sorted(
+            (factories.Dataset(type='showcase', notes='# Title {}'.format(i))
+             for i in range(0, 5)),
+            key=lambda showcase: showcase['id'])
+
+        migrated = markdown_to_html(batch_size=2,
+                                    resume_from=showcases[1]['id'])
+
+        assert migrated == 3
+        for i, showcase in enumerate(showcases):
+            notes = test_helpers.call_action(
+                'package_show',
+                context={'ignore_auth': True},
+                id=showcase['id']
+            )['notes']
+            if i <= 1:
+                assert notes == showcase['notes']
+            else:
+                assert notes == helpers.render_markdown(showcase['notes'])
+
+    def test_markdown_to_html_dry_run(self):
+        showcase = factories.Dataset(type='showcase', notes='# Title')
+
+        assert markdown_to_html(dry_run=True) == 1
+
+        notes = test_helpers.call_action(
+            'package_show',
+            context={'ignore_auth': True},
+            id=showcase['id']
+        )['notes']
+        assert notes == '# Title'
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestExportImport(object):
+
+    def test_export_showcases(self):
+        user = factories.User(name='admin-user')
+        dataset = factories.Dataset(name='my-dataset')
+        showcase = factories.Dataset(type='showcase', name='my-showcase',
+                                     title='My Showcase')
+        ShowcasePackageAssociation.create(package_id=dataset['id'],
+                                          showcase_id=showcase['id'])
+        ShowcaseAdmin.create(user_id=user['id'])
+
+        output = io.StringIO()
+        counts = export_showcases(output)
+
+        records = [json.loads(line)
+                   for line in output.getvalue().splitlines()]
+        assert counts == {'showcase': 1, 'association': 1, 'admin': 1}
+        assert records[0]['type'] == 'showcase'
+        assert records[0]['name'] == 'my-showcase'
+        assert records[0]['title'] == 'My Showcase'
+        assert 'id' not in records[0]
+        assert records[1:] == [
+            {'type': 'association', 'showcase': 'my-showcase',
+             'package': 'my-dataset'},
+            {'type': 'admin', 'user': 'admin-user'},
+        ]
+
+    def test_export_uploaded_image_as_url(self):
+        factories.Dataset(type='showcase', name='uploaded',
+                          image_url='screenshot.png')
+        factories.Dataset(type='showcase', name='linked',
+                          image_url='https://example.com/screenshot.png')
+
+        output = io.StringIO()
+        export_showcases(output)
+
+        image_urls = dict(
+            (record['name'], record['image_url'])
+            for record in map(json.loads, output.getvalue().splitlines())
+            if record['type'] == 'showcase')
+        assert image_urls['uploaded'].startswith('http')
+        assert image_urls['uploaded'].endswith(
+            '/uploads/showcase/screenshot.png')
+        assert image_urls['linked'] == 'https://example.com/screenshot.png'
+
+    def test_import_showcases(self):
+        user = factories.User(name='admin-user')
+        datasets = [factories.Dataset(name='dataset-{}'.format(i))
+                    for i in range(0, 3)]
+        records = [
+            {'type': 'showcase', 'name': 'my-showcase',
+             'title': 'My Showcase', 'tags': [{'name': 'apps'}]},
+        ] + [
+            {'type': 'association', 'showcase': 'my-showcase',
+             'package': dataset['name']} for dataset in datasets
+        ] + [
+            {'type': 'association', 'showcase': 'my-showcase',
+             'package': 'not-a-dataset'},
+            {'type': 'admin', 'user': 'admin-user'},
+        ]
+        input_file = io.StringIO(
+            ''.join(json.dumps(record) + '\n' for record in records))
+
+        result = import_showcases(input_file, batch_size=2)
+
+        assert result['created'] == {
+            'showcase': 1, 'association': 3, 'admin': 1}
+        assert result['skipped'] == {
+            'showcase': 0, 'association': 1, 'admin': 0}
+        showcase = test_helpers.call_action('package_show', id='my-showcase')
+        assert showcase['type'] == 'showcase'
+        assert [tag['name'] for tag in showcase['tags']] == ['apps']
+        pkg_list = test_helpers.call_action('ckanext_showcase_package_list',
+                                            showcase_id=showcase['id'])
+        assert sorted(pkg['name'] for pkg in pkg_list) == sorted(
+            dataset['name'] for dataset in datasets)
+        assert ShowcaseAdmin.exists(user_id=user['id'])
+
+        # importing again creates nothing new
+        input_file.seek(0)
+        result = import_showcases(input_file)
+
+        assert result['created'] == {
+            'showcase': 0, 'association': 0, 'admin': 0}
+
+    def test_import_associations_of_active_showcases_only(self):
+        dataset = factories.Dataset(name='my-dataset')
+        deleted = factories.Dataset(name='deleted-dataset')
+        test_helpers.call_action('package_delete', id=deleted['id'])
+        showcase = factories.Dataset(type='showcase', name='my-showcase')
+        records = [
+            {'type': 'association', 'showcase': 'my-showcase',
+             'package': 'deleted-dataset'},
+            {'type': 'association', 'showcase': 'my-dataset',
+             'package': 'my-dataset'},
+            {'type': 'association', 'showcase': 'my-showcase',
+             'package': 'my-dataset'},
+        ]
+        input_file = io.StringIO(
+            ''.join(json.dumps(record) + '\n' for record in records))
+
+        result = import_showcases(input_file)
+
+        assert result['created']['association'] == 1
+        assert result['skipped']['association'] == 2
+        assert not ShowcasePackageAssociation.get_showcase_ids_for_package(
+            deleted['id'])
+        assert [
+            showcase_id for (showcase_id,) in
+            ShowcasePackageAssociation.get_showcase_ids_for_package(
+                dataset['id'])
+        ] == [showcase['id']]
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestReindex(object):
+
+    def _create(self):
+        datasets = [factories.Dataset() for i in range(0, 2)]
+        factories.Dataset()
+        showcase = factories.Dataset(type='showcase')
+        ShowcasePackageAssociation.create(package_id=datasets[0]['id'],
+                                          showcase_id=showcase['id'])
+        search.clear_all()
+        return datasets, showcase
+
+    @pytest.mark.parametrize("only,expected", [
+        ("showcases", 1),
+        ("datasets", 1),
+        ("all", 2),
+    ])
+    def test_reindex_only(self, only, expected):
+        self._create()
+
+        assert reindex(only=only, batch_size=1) == expected
+
+    def test_reindex_datasets_indexes_membership(self):
+        datasets, showcase = self._create()
+
+        reindex(only='datasets')
+
+        pkg_list = test_helpers.call_action('ckanext_showcase_package_list',
+                                            showcase_id=showcase['id'])
+        assert [pkg['id'] for pkg in pkg_list] == [datasets[0]['id']]
@@ -1,19 +1,26 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import print_function
+import contextlib
 import json
 import logging
+import multiprocessing
+import time
 
 from collections import OrderedDict
 from urllib.parse import urlencode
 
+from sqlalchemy.orm import aliased
+from flask import make_response
+
 import ckan.model as model
 import ckan.plugins as p
-import ckan.logic as logic
-import ckan.lib.navl.dictization_functions as dict_fns
 import ckan.lib.helpers as h
+import ckan.lib.search as search
+import ckan.lib.uploader as uploader
 import ckan.plugins.toolkit as tk
-from ckanext.showcase.model import ShowcasePackageAssociation
+
+from ckanext.showcase.model import ShowcaseAdmin, ShowcasePackageAssociation
 
 _ = tk._
 abort = tk.abort
@@ -21,6 +28,46 @@ abort = tk.abort
 log = logging.getLogger(__name__)
 DATASET_TYPE_NAME = 'showcase'
 
+# Solr field holding the ids of the showcases a dataset belongs to. CKAN's
+# Solr schema indexes `vocab_*` fields as multi-valued strings.
+SHOWCASE_IDS_INDEX_FIELD = 'vocab_showcase_ids'
+
+
+# Solr fields of the showcase documents describing their datasets, so
+# showcases can be faceted and sorted on them. The number of datasets is
+# indexed as a zero-padded string, which CKAN's Solr schema can sort.
+NUM_DATASETS_INDEX_FIELD = 'showcase_num_datasets'
+ORGANIZATIONS_INDEX_FIELD = 'vocab_showcase_organizations'
+RES_FORMATS_INDEX_FIELD = 'vocab_showcase_res_formats'
+NUM_DATASETS_INDEX_WIDTH = 6
+
+UPLOAD_PATH = '/showcase_upload'
+# allowance for the multipart boundaries and headers around the uploaded file
+UPLOAD_OVERHEAD = 16 * 1024
+
+
+def format_num_datasets_for_index(num_datasets):
+    return str(num_datasets).zfill(NUM_DATASETS_INDEX_WIDTH)
+
+
+def showcase_membership_fq(showcase_id):
+    '''
+    Return a Solr filter query matching the datasets in the given showcase.
+    '''
+    return '{0}:"{1}"'.format(SHOWCASE_IDS_INDEX_FIELD, showcase_id)
+
+
+def reindex_packages(package_ids, defer_commit=False):
+    '''
+    Update the search index documents of the given packages, eg after their
+    showcase associations changed.
+    '''
+    if package_ids:
+        # rebuild never commits when given package_ids
+        search.rebuild(package_ids=package_ids, defer_commit=True)
+        if not defer_commit:
+            search.commit()
+
 
 def check_edit_view_auth(id):
     context = {
@@ -73,17 +120,21 @@ def read_view(id):
 
     # check if showcase exists
     try:
-        pkg_dict = tk.get_action('package_show')(context, data_dict)
+        pkg_dict = tk.get_action('package_show')(
+            dict(context, showcase_count_datasets=False), data_dict)
     except tk.ObjectNotFound:
         return tk.abort(404, _('Showcase not found'))
     except tk.NotAuthorized:
         return tk.abort(401, _('Unauthorized to read showcase'))
 
-    # get showcase packages
+    # get showcase packages, the sidebar only links to them
     showcase_pkgs = tk.get_action('ckanext_showcase_package_list')(
         context, {
-            'showcase_id': pkg_dict['id']
+            'showcase_id': pkg_dict['id'],
+            'fl': ['id', 'name', 'title']
         })
+    # the datasets are all listed already, no need to count them again
+    pkg_dict['num_datasets'] = len(showcase_pkgs)
 
     package_type = DATASET_TYPE_NAME
     return tk.render('showcase/read.html',
@@ -97,7 +148,9 @@ def manage_datasets_view(id):
     context = {
         'model': model,
         'session': model.Session,
-        'user': tk.g.user or tk.g.author
+        'user': tk.g.user or tk.g.author,
+        # the showcase is only used for its id and name
+        'showcase_extras': False
     }
     data_dict = {'id': id}
 
@@ -130,17 +183,20 @@ def manage_datasets_view(id):
             if param.startswith('dataset_'):
                 dataset_ids.append(param[8:])
         if dataset_ids:
-            for dataset_id in dataset_ids:
-                tk.get_action('ckanext_showcase_package_association_delete')(
+            result = tk.get_action(
+                'ckanext_showcase_package_association_bulk_delete')(
                     context, {
                         'showcase_id': pkg_dict['id'],
-                        'package_id': dataset_id
+                        'package_ids': dataset_ids
                     })
-            h.flash_success(
-                tk.ungettext(
-                    "The dataset has been removed from the showcase.",
-                    "The datasets have been removed from the showcase.",
-                    len(dataset_ids)))
+            for error in result['errors'].values():
+                h.flash_notice(error)
+            if result['deleted']:
+                h.flash_success(
+                    tk.ungettext(
+                        "The dataset has been removed from the showcase.",
+                        "The datasets have been removed from the showcase.",
+                        len(result['deleted'])))
             url = h.url_for(manage_route, id=id)
             return h.redirect_to(url)
 
@@ -154,25 +210,20 @@ def manage_datasets_view(id):
             if param.startswith('dataset_'):
                 dataset_ids.append(param[8:])
         if dataset_ids:
-            successful_adds = []
-            for dataset_id in dataset_ids:
-                try:
-                    tk.get_action(
-                        'ckanext_showcase_package_association_create')(
-                            context, {
-                                'showcase_id': pkg_dict['id'],
-                                'package_id': dataset_id
-                            })
-                except tk.ValidationError as e:
-                    h.flash_notice(e.error_summary)
-                else:
-                    successful_adds.append(dataset_id)
-            if successful_adds:
+            result = tk.get_action(
+                'ckanext_showcase_package_association_bulk_create')(
+                    context, {
+                        'showcase_id': pkg_dict['id'],
+                        'package_ids': dataset_ids
+                    })
+            for error in result['errors'].values():
+                h.flash_notice(error)
+            if result['created']:
                 h.flash_success(
                     tk.ungettext(
                         "The dataset has been added to the showcase.",
                         "The datasets have been added to the showcase.",
-                        len(successful_adds)))
+                        len(result['created'])))
             url = h.url_for(manage_route, id=id)
             return h.redirect_to(url)
 
@@ -183,6 +234,7 @@ def manage_datasets_view(id):
         context, {
             'showcase_id': pkg_dict['id']
         })
+    pkg_dict['num_datasets'] = len(showcase_pkgs)
 
     extra_vars['pkg_dict'] = pkg_dict
     extra_vars['showcase_pkgs'] = showcase_pkgs
@@ -196,8 +248,6 @@ def _add_dataset_search(showcase_id, showcase_name):
     Search logic for discovering datasets to add to a showcase.
     '''
 
-    from ckan.lib.search import SearchError
-
     package_type = 'dataset'
     extra_vars = {}
 
@@ -307,14 +357,9 @@ def _add_dataset_search(showcase_id, showcase_name):
             fq += ' +dataset_type:{type}'.format(type=package_type)
 
         # Only search for packages that aren't already associated with the
-        # Showcase
-        associated_package_ids = ShowcasePackageAssociation.get_package_ids_for_showcase(
-            showcase_id)
-        # flatten resulting list to space separated string
-        if associated_package_ids:
-            associated_package_ids_str = \
-                ' OR '.join([id[0] for id in associated_package_ids])
-            fq += ' !id:({0})'.format(associated_package_ids_str)
+        # Showcase. This is a filter query of its own, so Solr caches it once
+        # per showcase, whatever else is being searched for.
+        fq_list = ['-' + showcase_membership_fq(showcase_id)]
 
         facets = OrderedDict()
 
@@ -349,6 +394,7 @@ def _add_dataset_search(showcase_id, showcase_name):
         data_dict = {
             'q': q,
             'fq': fq.strip(),
+            'fq_list': fq_list,
             'facet.field': list(facets.keys()),
             'rows': limit,
             'start': (page - 1) * limit,
@@ -367,7 +413,7 @@ def _add_dataset_search(showcase_id, showcase_name):
         extra_vars['facets'] = query['facets']
         extra_vars['search_facets'] = query['search_facets']
         extra_vars['page.items'] = query['results']
-    except SearchError as se:
+    except search.SearchError as se:
         log.error('Dataset search error: %r', se.args)
         extra_vars['query_error'] = True
         extra_vars['facets'] = {}
@@ -421,7 +467,7 @@ def delete_view(id):
 
     index_route = 'showcase_blueprint.index'
 
-    context = {'user': tk.g.user}
+    context = {'user': tk.g.user, 'showcase_extras': False}
     try:
         if tk.request.method == 'POST':
             tk.get_action('ckanext_showcase_delete')(context, {'id': id})
@@ -506,7 +552,8 @@ def dataset_showcase_list(id):
             h.url_for(list_route, id=pkg_dict['name']))
 
     pkg_showcase_ids = [showcase['id'] for showcase in showcase_list]
-    site_showcases = tk.get_action('ckanext_showcase_list')(context, {})
+    site_showcases = tk.get_action('ckanext_showcase_list')(
+        context, {'fields': ['id', 'title']})
 
     showcase_dropdown = [[showcase['id'], showcase['title']]
                            for showcase in site_showcases
@@ -604,57 +651,444 @@ def remove_showcase_admin():
                      extra_vars={'user_dict': user_dict, 'user_id': user_id})
 
 
-def markdown_to_html():
+@contextlib.contextmanager
+def _solr_commit_deferred():
+    '''
+    Turn off the Solr commit made when indexing each package for the
+    duration of the block.
+
+    CKAN reads ckan.search.solr_commit from the config whenever it indexes a
+    package, and package_patch has no option to skip the commit, so this
+    applies to the whole process.
+    '''
+    solr_commit = tk.config.get('ckan.search.solr_commit', True)
+    tk.config['ckan.search.solr_commit'] = False
+    try:
+        yield
+    finally:
+        tk.config['ckan.search.solr_commit'] = solr_commit
+
+
+def _markdown_to_html_worker_init():
+    # the worker processes only run the migration, their Solr commit can be
+    # left off for their whole life
+    tk.config['ckan.search.solr_commit'] = False
+
+
+def _markdown_to_html_worker(args):
+    '''
+    Render and save the notes of the given showcases, then commit them to
+    Solr at once.
+    '''
+    showcase_ids, dry_run = args
+    if not showcase_ids:
+        return 0
+    showcases = model.Session.query(model.Package.id, model.Package.notes) \
+        .filter(model.Package.id.in_(showcase_ids)).all()
+    rendered = [(showcase.id, h.render_markdown(showcase.notes or ''))
+                for showcase in showcases]
+    if not dry_run:
+        context = _site_user_context()
+        for showcase_id, html in rendered:
+            tk.get_action('package_patch')(
+                dict(context), {'id': showcase_id, 'notes': html})
+        search.commit()
+    model.Session.remove()
+    return len(rendered)
+
+
+def markdown_to_html(batch_size=100, workers=1, dry_run=False,
+                     resume_from=None, echo=log.info):
     ''' Migrates the notes of all showcases from markdown to html.
 
     When using CKEditor, notes on showcases are stored in html instead of
     markdown, this command will migrate all nothes using CKAN's
     render_markdown core helper.
+
+    Showcases are migrated in batches of `batch_size`, in the order of their
+    ids, starting after `resume_from` if given. Each batch is split between
+    `workers` processes, which render the notes, save them with
+    package_patch and commit them to Solr once. With `dry_run`, the notes
+    are rendered but nothing is saved.
+
+    :returns: the number of showcases migrated
+    :rtype: int
+    '''
+    showcases = model.Session.query(model.Package.id) \
+        .filter(model.Package.type == DATASET_TYPE_NAME) \
+        .filter(model.Package.state == 'active')
+    if resume_from:
+        showcases = showcases.filter(model.Package.id > resume_from)
+    total = showcases.count()
+
+    pool = None
+    if workers > 1:
+        # as in reindex, the connections of this process must not be shared
+        # with the workers
+        model.Session.remove()
+        model.meta.engine.dispose()
+        pool = multiprocessing.Pool(
+            workers, initializer=_markdown_to_html_worker_init)
+
+    done = 0
+    last_id = resume_from
+    start = time.monotonic()
+    try:
+        while True:
+            batch = showcases
+            if last_id:
+                batch = batch.filter(model.Package.id > last_id)
+            showcase_ids = [
+                showcase_id for (showcase_id,) in
+                batch.order_by(model.Package.id).limit(batch_size)]
+            if not showcase_ids:
+                break
+            last_id = showcase_ids[-1]
+
+            if pool:
+                pool.map(_markdown_to_html_worker, [
+                    (showcase_ids[worker::workers], dry_run)
+                    for worker in range(workers)])
+            else:
+                with _solr_commit_deferred():
+                    _markdown_to_html_worker((showcase_ids, dry_run))
+
+            done += len(showcase_ids)
+            elapsed = time.monotonic() - start
+            echo('{0}/{1} showcases {2} ({3:.1f}/s), last id: {4}'.format(
+                done, total, 'rendered' if dry_run else 'migrated',
+                done / elapsed if elapsed else 0, last_id))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    if dry_run:
+        echo('Dry run, no notes were changed.')
+    else:
+        log.info('All notes were migrated successfully.')
+    return done
+
+
+REINDEX_CHOICES = ('showcases', 'datasets', 'all')
+
+
+def _reindex_package_ids(only):
+    showcases = model.Session.query(model.Package.id) \
+        .filter(model.Package.type == DATASET_TYPE_NAME) \
+        .filter(model.Package.state == 'active')
+    datasets = model.Session.query(model.Package.id) \
+        .join(ShowcasePackageAssociation,
+              ShowcasePackageAssociation.package_id == model.Package.id) \
+        .filter(model.Package.type != DATASET_TYPE_NAME) \
+        .filter(model.Package.state == 'active') \
+        .distinct()
+    if only == 'showcases':
+        query = showcases
+    elif only == 'datasets':
+        query = datasets
+    else:
+        query = showcases.union(datasets)
+    return sorted(package_id for (package_id,) in query)
+
+
+def _reindex_worker(package_ids, batch_size, echo, label=''):
+    start = time.monotonic()
+    for i in range(0, len(package_ids), batch_size):
+        batch = package_ids[i:i + batch_size]
+        reindex_packages(batch, defer_commit=True)
+        search.commit()
+        done = i + len(batch)
+        elapsed = time.monotonic() - start
+        echo('{0}{1}/{2} indexed ({3:.1f} docs/s)'.format(
+            label, done, len(package_ids),
+            done / elapsed if elapsed else 0))
+    model.Session.remove()
+
+
+def reindex(only='all', workers=1, batch_size=100, echo=log.info):
+    ''' Rebuilds the search index documents of the showcases, of the
+    datasets in a showcase, or of both (`only`), without reindexing every
+    other dataset of the site.
+
+    The packages are split between `workers` processes, which commit to Solr
+    every `batch_size` documents.
+
+    :returns: the number of packages reindexed
+    :rtype: int
     '''
-    showcases = tk.get_action('ckanext_showcase_list')({},{})
+    if only not in REINDEX_CHOICES:
+        raise ValueError('only must be one of {0}'.format(
+            ', '.join(REINDEX_CHOICES)))
 
+    package_ids = _reindex_package_ids(only)
+    total = len(package_ids)
+    workers = max(1, min(workers, total))
+    start = time.monotonic()
+
+    if workers == 1:
+        _reindex_worker(package_ids, batch_size, echo)
+    else:
+        # as in CKAN's search-index rebuild-fast, but the connections of this
+        # process must not be shared with the workers
+        model.Session.remove()
+        model.meta.engine.dispose()
+        processes = []
+        for worker in range(workers):
+            process = multiprocessing.Process(
+                target=_reindex_worker,
+                args=(package_ids[worker::workers], batch_size, echo,
+                      '[worker {0}] '.format(worker + 1)))
+            process.daemon = True
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+        failed = [process for process in processes if process.exitcode]
+        if failed:
+            raise RuntimeError('{0} of {1} reindex workers failed'.format(
+                len(failed), workers))
+        search.commit()
+
+    elapsed = time.monotonic() - start
+    echo('Reindexed {0} packages in {1:.1f}s ({2:.1f} docs/s)'.format(
+        total, elapsed, total / elapsed if elapsed else 0))
+    return total
+
+
+SHOWCASE_EXPORT_FIELDS = ('name', 'title', 'notes', 'url', 'author',
+                          'author_email', 'image_url', 'extras', 'tags')
+
+
+def _site_user_context():
     site_user = tk.get_action('get_site_user')({
         'model': model,
         'ignore_auth': True},
         {}
     )
-    context = {
+    return {
         'model': model,
         'session': model.Session,
         'ignore_auth': True,
         'user': site_user['name'],
     }
 
-    for showcase in showcases:
-        tk.get_action('package_patch')(
-            context,
-            {
-                'id': showcase['id'],
-                'notes': h.render_markdown(showcase['notes'])
-            }
-        )
-    log.info('All notes were migrated successfully.')
+
+def export_showcases(output_file, batch_size=1000):
+    ''' Writes the showcases, their dataset associations and the showcase
+    admins to `output_file` as JSON Lines, one record at a time.
+
+    Records have a `type` key: `showcase` records hold the showcase fields,
+    `association` records the names of a showcase and one of its datasets,
+    and `admin` records the name of a showcase admin. Uploaded images are
+    exported as their absolute url on this site.
+
+    :returns: the number of records written for each type
+    :rtype: dict
+    '''
+    context = dict(_site_user_context(), showcase_extras=False)
+    counts = dict.fromkeys(('showcase', 'association', 'admin'), 0)
+
+    def write(record):
+        output_file.write(json.dumps(record) + '\n')
+        counts[record['type']] += 1
+
+    showcase_ids = model.Session.query(model.Package.id) \
+        .filter(model.Package.type == DATASET_TYPE_NAME) \
+        .filter(model.Package.state == 'active') \
+        .order_by(model.Package.id) \
+        .yield_per(batch_size)
+    for (showcase_id,) in showcase_ids:
+        pkg_dict = tk.get_action('package_show')(dict(context),
+                                                 {'id': showcase_id})
+        record = {'type': 'showcase'}
+        for field in SHOWCASE_EXPORT_FIELDS:
+            if pkg_dict.get(field) is not None:
+                record[field] = pkg_dict[field]
+        if 'tags' in record:
+            record['tags'] = [{'name': tag['name']} for tag in record['tags']]
+        # uploaded images are stored as file names of this site, the other
+        # site can only link to them
+        if record.get('image_url') \
+                and not record['image_url'].startswith('http'):
+            record['image_url'] = pkg_dict['image_display_url']
+        write(record)
+
+    showcase = aliased(model.Package)
+    package = aliased(model.Package)
+    associations = model.Session.query(showcase.name, package.name) \
+        .join(ShowcasePackageAssociation,
+              ShowcasePackageAssociation.showcase_id == showcase.id) \
+        .join(package, ShowcasePackageAssociation.package_id == package.id) \
+        .filter(showcase.state == 'active') \
+        .filter(package.state == 'active') \
+        .order_by(showcase.name, package.name) \
+        .yield_per(batch_size)
+    for showcase_name, package_name in associations:
+        write({'type': 'association', 'showcase': showcase_name,
+               'package': package_name})
+
+    admins = model.Session.query(model.User.name) \
+        .join(ShowcaseAdmin, ShowcaseAdmin.user_id == model.User.id) \
+        .filter(model.User.state == 'active') \
+        .order_by(model.User.name)
+    for (username,) in admins:
+        write({'type': 'admin', 'user': username})
+
+    return counts
+
+
+def import_showcases(input_file, batch_size=1000, echo=log.info):
+    ''' Reads JSON Lines written by `export_showcases` from `input_file`, one
+    record at a time, and creates the showcases, associations and admins
+    that don't exist yet.
+
+    Associations are inserted `batch_size` at a time, with a single query to
+    resolve their names and a single INSERT per showcase. The datasets are
+    reindexed once their associations are in, committing to Solr once per
+    batch.
+
+    :returns: the number of records created and skipped for each type
+    :rtype: dict
+    '''
+    context = _site_user_context()
+    created = dict.fromkeys(('showcase', 'association', 'admin'), 0)
+    skipped = dict.fromkeys(('showcase', 'association', 'admin'), 0)
+    pending = []
+
+    def flush_associations():
+        active = model.Session.query(model.Package.name, model.Package.id) \
+            .filter(model.Package.state == 'active')
+        showcase_ids = dict(
+            active.filter(model.Package.type == DATASET_TYPE_NAME)
+            .filter(model.Package.name.in_(
+                set(showcase_name for showcase_name, _ in pending))))
+        dataset_ids = dict(active.filter(model.Package.name.in_(
+            set(package_name for _, package_name in pending))))
+
+        by_showcase = OrderedDict()
+        for showcase_name, package_name in pending:
+            if showcase_name not in showcase_ids \
+                    or package_name not in dataset_ids:
+                echo('Skipping association of {0} with {1}: not found'
+                     .format(package_name, showcase_name))
+                skipped['association'] += 1
+                continue
+            by_showcase.setdefault(showcase_ids[showcase_name], set()).add(
+                dataset_ids[package_name])
+
+        to_reindex = []
+        for showcase_id, package_ids in by_showcase.items():
+            existing = ShowcasePackageAssociation.get_associated_package_ids(
+                showcase_id, package_ids)
+            new = ShowcasePackageAssociation.create_many(
+                showcase_id, sorted(package_ids - existing))
+            skipped['association'] += len(package_ids) - len(new)
+            created['association'] += len(new)
+            if new:
+                to_reindex.extend(new + [showcase_id])
+
+        reindex_packages(sorted(set(to_reindex)), defer_commit=True)
+        search.commit()
+        del pending[:]
+
+    for line_number, line in enumerate(input_file, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        record_type = record.pop('type', None)
+
+        if record_type == 'association':
+            pending.append((record['showcase'], record['package']))
+            if len(pending) >= batch_size:
+                flush_associations()
+                echo('{0} associations imported'.format(
+                    created['association']))
+
+        elif record_type == 'showcase':
+            if model.Package.get(record['name']):
+                skipped['showcase'] += 1
+                continue
+            record['type'] = DATASET_TYPE_NAME
+            tk.get_action('package_create')(dict(context), record)
+            created['showcase'] += 1
+
+        elif record_type == 'admin':
+            user = model.User.get(record['user'])
+            if not user:
+                echo('Skipping showcase admin {0}: user not found'.format(
+                    record['user']))
+                skipped['admin'] += 1
+            elif ShowcaseAdmin.exists(user_id=user.id):
+                skipped['admin'] += 1
+            else:
+                ShowcaseAdmin.create(user_id=user.id)
+                created['admin'] += 1
+
+        else:
+            raise ValueError('Unknown record type on line {0}: {1}'.format(
+                line_number, record_type))
+
+    if pending:
+        flush_associations()
+
+    return {'created': created, 'skipped': skipped}
 
 
 def upload():
     if not tk.request.method == 'POST':
         tk.abort(409, _('Only Posting is availiable'))
 
-    data_dict = logic.clean_dict(
-        dict_fns.unflatten(
-            logic.tuplize_dict(
-                logic.parse_params(tk.request.files)
-            )
-        )
-    )
+    # Hand the uploaded file to the uploader as it is, so it can stream it to
+    # its destination instead of it being copied through parse_params.
+    data_dict = {'upload': tk.request.files.get('upload')}
 
     try:
-
         url = tk.get_action('ckanext_showcase_upload')(
             None,
             data_dict
         )
     except tk.NotAuthorized:
         tk.abort(401, _('Unauthorized to upload file %s') % id)
+    except tk.ValidationError as e:
+        return _json_response(
+            {'error': {'message': ' '.join(
+                str(message) for messages in e.error_dict.values()
+                for message in messages)}},
+            400)
 
-    return json.dumps(url)
+    return _json_response(url)
+
+
+def _json_response(data, status=200):
+    return make_response(json.dumps(data), status,
+                         {'Content-Type': 'application/json'})
+
+
+class UploadSizeLimitMiddleware(object):
+    '''
+    WSGI middleware refusing the uploads to the upload view whose
+    Content-Length can't fit under ckan.max_image_size, before Flask or any
+    request hook (eg the CSRF protection) reads and spools their body.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') == 'POST' \
+                and environ.get('PATH_INFO', '').endswith(UPLOAD_PATH):
+            try:
+                content_length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                content_length = 0
+            max_size = uploader.get_max_image_size() * 1024 * 1024
+            if content_length > max_size + UPLOAD_OVERHEAD:
+                body = json.dumps(
+                    {'error': {'message': 'File upload too large'}}
+                ).encode('utf-8')
+                start_response('413 Request Entity Too Large', [
+                    ('Content-Type', 'application/json'),
+                    ('Content-Length', str(len(body)))])
+                return [body]
+        return self.app(environ, start_response)
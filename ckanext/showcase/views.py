@@ -7,6 +7,7 @@ import ckan.lib.helpers as h
 import ckan.plugins.toolkit as tk
 import ckan.views.dataset as dataset
 
+import ckanext.showcase.storage as storage
 import ckanext.showcase.utils as utils
 
 showcase = Blueprint('showcase_blueprint', __name__)
@@ -145,10 +146,12 @@ showcase.add_url_rule('/ckan-admin/showcase_admin_remove',
                       view_func=admin_remove,
                       methods=['GET', 'POST'],
                       endpoint='admin_remove')
-showcase.add_url_rule('/showcase_upload',
+showcase.add_url_rule(utils.UPLOAD_PATH,
                       view_func=upload,
                       methods=['POST'])
 
+showcase.after_app_request(storage.add_cache_headers)
+
 
 def get_blueprints():
     return [showcase]